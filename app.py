@@ -1,5 +1,6 @@
 from flask import Flask, jsonify, request
 from flask_cors import CORS
+from datetime import datetime
 import data_simulator
 
 app = Flask(__name__)
@@ -21,8 +22,8 @@ def home():
 
 @app.route('/dashboard')
 def dashboard():
-    """Return complete dashboard data"""
-    return jsonify(data_simulator.get_dashboard_data())
+    """Return complete dashboard data (serialized once per tick)"""
+    return app.response_class(data_simulator.get_dashboard_json(), mimetype='application/json')
 
 @app.route('/alerts')
 def alerts():
@@ -42,7 +43,10 @@ def historical():
 @app.route('/region/<region_name>')
 def region_data(region_name):
     """Return data for specific region"""
-    return jsonify(data_simulator.get_region_data(region_name))
+    data = data_simulator.get_region_data(region_name)
+    if data is None:
+        return jsonify({"error": f"Unknown region: {region_name}"}), 404
+    return jsonify(data)
 
 @app.route('/health')
 def health():
@@ -0,0 +1,185 @@
+"""
+SSAcity Collection Event Log
+Append-only record of bin pickups with windowed KPI aggregates
+"""
+import heapq
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from models import CollectionEvent
+
+# Estimated weight of a completely full bin, used when a manifest has no scale reading
+BIN_CAPACITY_KG = 120.0
+
+def to_local_naive(value: datetime) -> datetime:
+    """Convert a timezone-aware datetime to naive local time, as used throughout the log"""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone().replace(tzinfo=None)
+
+class CollectionLog:
+    """Append-only collection event log indexed by bin and by day.
+
+    Running totals over a trailing window (24 hours by default) are kept
+    up to date on every append, so KPI reads never scan the log. Only the
+    last `horizon` days are held in memory; older day buckets are dropped
+    (the full history is persisted by the retention "collections" store).
+    Log positions stay stable across trimming, so cursors remain valid.
+    """
+
+    def __init__(self, window: timedelta = timedelta(hours=24), horizon: timedelta = timedelta(days=7)):
+        if horizon < window:
+            raise ValueError("horizon must cover the KPI window")
+        self.window = window
+        self.horizon = horizon
+        self._events: List[Optional[CollectionEvent]] = []
+        self._base = 0  # log position of _events[0]
+        self._live = 0
+        self._by_bin: Dict[str, List[int]] = defaultdict(list)
+        self._by_day: Dict[str, List[int]] = defaultdict(list)
+        self._trimmed_before = None
+        self._lock = threading.Lock()
+
+        # Windowed aggregates
+        self._window_heap = []  # (collected_at, position) of events inside the window
+        self._window_count = 0
+        self._window_weight = 0.0
+        self._window_bins: Dict[str, int] = defaultdict(int)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._live
+
+    def _event_at(self, position: int) -> Optional[CollectionEvent]:
+        index = position - self._base
+        return self._events[index] if 0 <= index < len(self._events) else None
+
+    def append(self, event: CollectionEvent) -> CollectionEvent:
+        """Append one event and fold it into the window aggregates"""
+        if event.collected_at.tzinfo is not None:
+            raise ValueError("collected_at must be a naive local datetime")
+        with self._lock:
+            # Compare before touching the indexes so a bad event can't be half-appended
+            now = datetime.now()
+            in_window = event.collected_at >= now - self.window
+            position = self._base + len(self._events)
+            self._events.append(event)
+            self._live += 1
+            self._by_bin[event.bin_id].append(position)
+            self._by_day[event.collected_at.date().isoformat()].append(position)
+
+            if in_window:
+                heapq.heappush(self._window_heap, (event.collected_at, position))
+                self._window_count += 1
+                self._window_weight += event.weight_kg
+                self._window_bins[event.bin_id] += 1
+            self._trim(now)
+        return event
+
+    def _trim(self, now: datetime):
+        """Drop day buckets older than the horizon; runs once per day"""
+        cutoff = (now - self.horizon).date().isoformat()
+        if cutoff == self._trimmed_before:
+            return
+        self._trimmed_before = cutoff
+        dropped = defaultdict(set)
+        for day in [d for d in self._by_day if d < cutoff]:
+            for position in self._by_day.pop(day):
+                event = self._event_at(position)
+                if event is not None:
+                    self._events[position - self._base] = None
+                    self._live -= 1
+                    dropped[event.bin_id].add(position)
+        for bin_id, positions in dropped.items():
+            remaining = [p for p in self._by_bin[bin_id] if p not in positions]
+            if remaining:
+                self._by_bin[bin_id] = remaining
+            else:
+                del self._by_bin[bin_id]
+        # Late manifest entries can leave gaps; only the leading run is released
+        leading = 0
+        while leading < len(self._events) and self._events[leading] is None:
+            leading += 1
+        if leading:
+            del self._events[:leading]
+            self._base += leading
+
+    def _expire(self, now: Optional[datetime] = None):
+        """Drop events that have slid out of the window (amortized O(1) per event)"""
+        cutoff = (now or datetime.now()) - self.window
+        while self._window_heap and self._window_heap[0][0] < cutoff:
+            _, position = heapq.heappop(self._window_heap)
+            event = self._event_at(position)
+            if event is None:
+                continue
+            self._window_count -= 1
+            self._window_weight -= event.weight_kg
+            self._window_bins[event.bin_id] -= 1
+            if self._window_bins[event.bin_id] == 0:
+                del self._window_bins[event.bin_id]
+
+    def collections_in_window(self) -> int:
+        with self._lock:
+            self._expire()
+            return self._window_count
+
+    def weight_in_window(self) -> float:
+        with self._lock:
+            self._expire()
+            return max(0.0, self._window_weight)
+
+    def bins_collected_in_window(self) -> int:
+        with self._lock:
+            self._expire()
+            return len(self._window_bins)
+
+    def events_for_bin(self, bin_id: str, since: Optional[datetime] = None) -> List[CollectionEvent]:
+        """Events for one bin within the horizon, oldest first"""
+        with self._lock:
+            events = [self._event_at(p) for p in self._by_bin.get(bin_id, [])]
+        events = [e for e in events if e is not None and (since is None or e.collected_at >= since)]
+        return sorted(events, key=lambda e: e.collected_at)
+
+    def events_between(self, start: datetime, end: datetime) -> List[CollectionEvent]:
+        """Events collected in [start, end), looked up through the day index"""
+        events = []
+        with self._lock:
+            day = start.date()
+            while day <= end.date():
+                for position in self._by_day.get(day.isoformat(), []):
+                    event = self._event_at(position)
+                    if event is not None and start <= event.collected_at < end:
+                        events.append(event)
+                day += timedelta(days=1)
+        return sorted(events, key=lambda e: e.collected_at)
+
+    def events_since(self, cursor: int = 0, limit: int = 1000) -> Tuple[List[CollectionEvent], int]:
+        """Events appended at log positions >= cursor, plus the cursor to resume from.
+
+        Positions already trimmed past the horizon are skipped.
+        """
+        with self._lock:
+            start = max(cursor, self._base) - self._base
+            chunk = self._events[start:start + max(0, limit)]
+            next_cursor = self._base + start + len(chunk)
+        return [e for e in chunk if e is not None], next_cursor
+
+    def recent_events(self, limit: int = 100) -> List[CollectionEvent]:
+        """Most recently appended events, newest first"""
+        events = []
+        with self._lock:
+            for event in reversed(self._events):
+                if len(events) >= limit:
+                    break
+                if event is not None:
+                    events.append(event)
+        return events
@@ -2,16 +2,42 @@
 SSAcity Smart City Data Pipeline
 Simulates real smart bin data and predictive analytics
 """
+import os
 import random
+import threading
 import time
+import uuid
 from datetime import datetime, timedelta
-from typing import List
-from models import SmartBin, CityZone, PredictiveAlert
+from typing import Dict, List, Optional
+from models import SmartBin, CityZone, PredictiveAlert, CollectionEvent, SEVERITY_ORDER
+from collection_events import CollectionLog, BIN_CAPACITY_KG, to_local_naive
+from notifications import AlertDispatcher, WebhookSubscriber
+from retention import RetentionManager
+from scheduler import AdaptiveScheduler
+
+# Zone centres used to place generated bins
+ZONE_CENTERS = {
+    "Z001": (-1.286389, 36.817223),
+    "Z002": (-1.264167, 36.804722),
+    "Z003": (-1.298611, 36.785833),
+    "Z004": (-1.319444, 36.709722),
+    "Z005": (-1.276389, 36.855556),
+}
 
 class SSAcityDataPipeline:
-    def __init__(self):
-        self.bins = self.initialize_smart_bins()
-        self.zones = self.initialize_city_zones()
+    def __init__(self, bins: Optional[List[SmartBin]] = None, zones: Optional[List[CityZone]] = None):
+        self.bins = bins if bins is not None else self.initialize_smart_bins()
+        self.zones = zones if zones is not None else self.initialize_city_zones()
+        self.bins_by_id = {b.bin_id: b for b in self.bins}
+        self.collections = CollectionLog()
+        self.active_alerts: Dict[str, Dict[str, int]] = {}
+        
+        # Callables notified with each updated SmartBin / newly raised PredictiveAlert / CollectionEvent
+        self.reading_listeners = []
+        self.alert_listeners = []
+        self.collection_listeners = []
+        # Callables notified with each SmartBin updated by an uploaded reading (not the simulation)
+        self.ingest_listeners = []
         
     def initialize_smart_bins(self) -> List[SmartBin]:
         """Initialize 10 SSA Smart Bins"""
@@ -55,59 +81,208 @@ class SSAcityDataPipeline:
             CityZone("Z005", "Eastleigh & Pangani", 420000, 52, 10500.7, "daily", 5),
         ]
     
+    def generate_smart_bins(self, bins_per_zone: int) -> List[SmartBin]:
+        """Generate a synthetic fleet of bins spread around each zone centre"""
+        bins = []
+        for zone in self.zones:
+            lat, lon = ZONE_CENTERS.get(zone.zone_id, (-1.286389, 36.817223))
+            prefix = zone.name.split()[0]
+            for i in range(bins_per_zone):
+                bins.append(SmartBin(
+                    bin_id=f"{zone.zone_id}_BIN_{i+1:06d}",
+                    location=f"{prefix}_{i+1:06d}",
+                    gps_lat=lat + random.uniform(-0.02, 0.02),
+                    gps_lon=lon + random.uniform(-0.02, 0.02),
+                    fill_level=random.randint(0, 100),
+                    temperature=random.uniform(18, 32),
+                    battery_level=random.uniform(30, 100),
+                    last_emptied=datetime.now() - timedelta(hours=random.randint(1, 48)),
+                    waste_type=random.choice(["plastic", "organic", "mixed"])
+                ))
+        return bins
+    
+    def zone_bins(self, zone: CityZone) -> List[SmartBin]:
+        """Bins whose location belongs to a zone"""
+        return [b for b in self.bins if zone.name.split()[0] in b.location]
+    
+    def update_bin(self, bin: SmartBin, ticks: float = 1.0):
+        """Advance one bin's sensors by a number of 30-second ticks"""
+        # Increase fill level
+        fill_increase = random.uniform(0.1, 2.0) * ticks
+        bin.fill_level = min(100, bin.fill_level + fill_increase)
+        
+        # Update temperature
+        bin.temperature = max(15, min(35, bin.temperature + random.uniform(-0.5, 0.5) * ticks ** 0.5))
+        
+        # Battery drain
+        bin.battery_level = max(0, bin.battery_level - random.uniform(0.01, 0.05) * ticks)
+        
+        # Random status changes
+        if random.random() < 1 - 0.995 ** ticks:  # 0.5% chance per tick
+            bin.status = "maintenance" if random.random() < 0.5 else "offline"
+        elif bin.status != "active" and random.random() < 1 - 0.9 ** ticks:
+            bin.status = "active"
+        
+        for listener in self.reading_listeners:
+            listener(bin)
+    
     def simulate_sensor_updates(self):
         """Update bin sensor data"""
         for bin in self.bins:
-            # Increase fill level
-            fill_increase = random.uniform(0.1, 2.0)
-            bin.fill_level = min(100, bin.fill_level + fill_increase)
-            
-            # Update temperature
-            bin.temperature = max(15, min(35, bin.temperature + random.uniform(-0.5, 0.5)))
-            
-            # Battery drain
-            bin.battery_level = max(0, bin.battery_level - random.uniform(0.01, 0.05))
-            
-            # Random status changes
-            if random.random() < 0.005:  # 0.5% chance
-                bin.status = "maintenance" if random.random() < 0.5 else "offline"
-            elif bin.status != "active" and random.random() < 0.1:
-                bin.status = "active"
+            self.update_bin(bin)
+    
+    def simulate_collection(self, bin: SmartBin, ticks: float = 1.0):
+        """Simulate a truck picking up a bin that is close to overflowing, over a number of 30-second ticks"""
+        if bin.status == "active" and bin.fill_level > 95 and random.random() < 1 - 0.7 ** ticks:  # 30% per tick
+            self.record_collection(bin.bin_id, truck_id=f"TRUCK_{random.randint(1, 5):02d}")
+    
+    def simulate_collections(self):
+        """Simulate trucks picking up bins that are close to overflowing"""
+        for bin in self.bins:
+            self.simulate_collection(bin)
+    
+    def record_collection(self, bin_id: str, collected_at: Optional[datetime] = None,
+                          weight_kg: Optional[float] = None, truck_id: Optional[str] = None) -> CollectionEvent:
+        """Record a pickup and empty the bin"""
+        bin = self.bins_by_id.get(bin_id)
+        if bin is None:
+            raise KeyError(f"Unknown bin: {bin_id}")
+        
+        collected_at = to_local_naive(collected_at) if collected_at else datetime.now()
+        if weight_kg is None:
+            weight_kg = round(bin.fill_level / 100 * BIN_CAPACITY_KG, 1)
+        
+        event = self.collections.append(CollectionEvent(
+            event_id=f"COL_{uuid.uuid4().hex[:12]}",
+            bin_id=bin_id,
+            collected_at=collected_at,
+            weight_kg=weight_kg,
+            fill_level_before=bin.fill_level,
+            truck_id=truck_id
+        ))
+        
+        # Late manifest entries must not roll back a newer pickup
+        if bin.last_emptied is None or collected_at >= bin.last_emptied:
+            bin.fill_level = 0
+            bin.last_emptied = collected_at
+        for listener in self.collection_listeners:
+            listener(event)
+        return event
+    
+    def record_collections(self, manifest: List[Dict]) -> List[CollectionEvent]:
+        """Record a truck manifest: a list of {bin_id, collected_at?, weight_kg?, truck_id?}"""
+        unknown = [e["bin_id"] for e in manifest if e["bin_id"] not in self.bins_by_id]
+        if unknown:
+            raise KeyError(f"Unknown bins: {', '.join(unknown)}")
+        
+        now = datetime.now()
+        entries = [dict(e, collected_at=to_local_naive(e["collected_at"]) if e.get("collected_at") else now)
+                   for e in manifest]
+        events = []
+        for entry in sorted(entries, key=lambda e: e["collected_at"]):
+            events.append(self.record_collection(
+                entry["bin_id"],
+                collected_at=entry["collected_at"],
+                weight_kg=entry.get("weight_kg"),
+                truck_id=entry.get("truck_id")
+            ))
+        return events
+    
+    def ingest_readings(self, readings: List[Dict]) -> Dict:
+        """Apply a batch of sensor readings ({bin_id, fill_level?, temperature?, battery_level?, status?}).
+
+        The whole batch is validated first, so a bad reading leaves every bin untouched.
+        """
+        updates = []
+        unknown = []
+        for index, reading in enumerate(readings):
+            if not isinstance(reading, dict):
+                raise TypeError(f"Reading {index} is not an object")
+            bin = self.bins_by_id.get(reading.get("bin_id"))
+            if bin is None:
+                unknown.append(reading.get("bin_id"))
+                continue
+            values = {}
+            try:
+                if reading.get("fill_level") is not None:
+                    values["fill_level"] = max(0, min(100, float(reading["fill_level"])))
+                if reading.get("temperature") is not None:
+                    values["temperature"] = float(reading["temperature"])
+                if reading.get("battery_level") is not None:
+                    values["battery_level"] = max(0, min(100, float(reading["battery_level"])))
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"Reading {index} ({bin.bin_id}): {e}")
+            if reading.get("status"):
+                if not isinstance(reading["status"], str):
+                    raise ValueError(f"Reading {index} ({bin.bin_id}): status must be a string")
+                values["status"] = reading["status"]
+            updates.append((bin, values))
+        
+        for bin, values in updates:
+            for field, value in values.items():
+                setattr(bin, field, value)
+            for listener in self.reading_listeners:
+                listener(bin)
+            self.check_alerts(bin)
+            for listener in self.ingest_listeners:
+                listener(bin)
+        return {"applied": len(updates), "unknown_bins": unknown}
+    
+    def bin_alerts(self, bin: SmartBin) -> List[PredictiveAlert]:
+        """Alerts currently raised by one bin"""
+        alerts = []
+        if bin.fill_level > 85:
+            alerts.append(PredictiveAlert(
+                alert_id=f"ALERT_{bin.bin_id}_{int(time.time())}",
+                type="overflow_risk",
+                location=bin.location,
+                severity="critical" if bin.fill_level > 95 else "high",
+                predicted_time=datetime.now() + timedelta(hours=random.randint(1, 6)),
+                confidence=min(0.95, bin.fill_level / 100),
+                recommended_action=f"Schedule collection for {bin.location}"
+            ))
+        
+        if bin.battery_level < 20:
+            alerts.append(PredictiveAlert(
+                alert_id=f"BATT_{bin.bin_id}_{int(time.time())}",
+                type="maintenance_needed",
+                location=bin.location,
+                severity="medium",
+                predicted_time=datetime.now() + timedelta(days=7),
+                confidence=0.8,
+                recommended_action=f"Replace battery at {bin.location}"
+            ))
+        return alerts
     
     def get_predictive_alerts(self) -> List[PredictiveAlert]:
         """Generate predictive alerts"""
         alerts = []
-        
         for bin in self.bins:
-            if bin.fill_level > 85:
-                alerts.append(PredictiveAlert(
-                    alert_id=f"ALERT_{bin.bin_id}_{int(time.time())}",
-                    type="overflow_risk",
-                    location=bin.location,
-                    severity="critical" if bin.fill_level > 95 else "high",
-                    predicted_time=datetime.now() + timedelta(hours=random.randint(1, 6)),
-                    confidence=min(0.95, bin.fill_level / 100),
-                    recommended_action=f"Schedule collection for {bin.location}"
-                ))
-            
-            if bin.battery_level < 20:
-                alerts.append(PredictiveAlert(
-                    alert_id=f"BATT_{bin.bin_id}_{int(time.time())}",
-                    type="maintenance_needed",
-                    location=bin.location,
-                    severity="medium",
-                    predicted_time=datetime.now() + timedelta(days=7),
-                    confidence=0.8,
-                    recommended_action=f"Replace battery at {bin.location}"
-                ))
-        
+            alerts.extend(self.bin_alerts(bin))
         return alerts
     
+    def check_alerts(self, bin: SmartBin) -> List[PredictiveAlert]:
+        """Alerts that this bin raised or escalated since its last check; passed to alert listeners"""
+        alerts = self.bin_alerts(bin)
+        active = {a.type: SEVERITY_ORDER.get(a.severity, len(SEVERITY_ORDER)) for a in alerts}
+        previous = self.active_alerts.get(bin.bin_id, {})
+        if active:
+            self.active_alerts[bin.bin_id] = active
+        else:
+            self.active_alerts.pop(bin.bin_id, None)
+        
+        # A lower severity rank is more urgent; de-escalation is tracked but not re-sent
+        new_alerts = [a for a in alerts if a.type not in previous or active[a.type] < previous[a.type]]
+        for alert in new_alerts:
+            for listener in self.alert_listeners:
+                listener(alert)
+        return new_alerts
+    
     def get_zone_analytics(self):
         """Get analytics by zone"""
         analytics = []
         for zone in self.zones:
-            zone_bins = [b for b in self.bins if zone.name.split()[0] in b.location]
+            zone_bins = self.zone_bins(zone)
             avg_fill = sum(b.fill_level for b in zone_bins) / len(zone_bins) if zone_bins else 0
             
             analytics.append({
@@ -136,26 +311,50 @@ class SSAcityDataPipeline:
     def get_operational_kpis(self):
         """Get operational KPIs"""
         return {
-            "total_collections_today": random.randint(15, 25),
-            "total_waste_collected_kg": round(random.uniform(5000, 15000), 1),
+            "total_collections_today": self.collections.collections_in_window(),
+            "total_waste_collected_kg": round(self.collections.weight_in_window(), 1),
             "avg_route_efficiency": round(random.uniform(75, 95), 1),
             "bins_above_80": len([b for b in self.bins if b.fill_level > 80]),
             "bins_offline": len([b for b in self.bins if b.status != "active"]),
-            "collection_coverage": round(random.uniform(85, 98), 1)
+            "collection_coverage": round(
+                self.collections.bins_collected_in_window() / len(self.bins) * 100, 1
+            ) if self.bins else 0
         }
 
-# Global instance
+# Global instance; background services are started by the serving process
 pipeline = SSAcityDataPipeline()
+retention = None
+dispatcher = None
+scheduler = None
 
-# Background sensor updates
-import threading
-def update_sensors():
-    while True:
-        pipeline.simulate_sensor_updates()
-        time.sleep(30)  # Update every 30 seconds
+def start_background_services():
+    """Start persistence, alert notifications and sensor updates for the global pipeline.
 
-thread = threading.Thread(target=update_sensors, daemon=True)
-thread.start()
+    Kept out of module import so SSAcityDataPipeline can be imported (e.g. by
+    sharding and what_if worker processes) without creating files or threads.
+    """
+    global retention, dispatcher, scheduler
+    if scheduler is not None:
+        return
+    
+    # Persist readings and alert history, with TTLs, compaction and archival
+    retention = RetentionManager(os.environ.get(
+        "SSACITY_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")))
+    pipeline.reading_listeners.append(retention.record_reading)
+    pipeline.alert_listeners.append(retention.record_alert)
+    pipeline.collection_listeners.append(retention.record_collection)
+    retention.start()
+    
+    # Push newly raised alerts to subscribers (webhook URLs from SSACITY_ALERT_WEBHOOKS, comma-separated)
+    dispatcher = AlertDispatcher([WebhookSubscriber(url.strip())
+                                  for url in os.environ.get("SSACITY_ALERT_WEBHOOKS", "").split(",") if url.strip()])
+    pipeline.alert_listeners.append(dispatcher.publish)
+    dispatcher.start()
+    
+    # Background sensor updates, paced per bin by urgency
+    scheduler = AdaptiveScheduler(pipeline)
+    pipeline.ingest_listeners.append(scheduler.reschedule)
+    threading.Thread(target=scheduler.run, daemon=True).start()
 
 # API functions
 def get_smart_bins():
@@ -174,4 +373,33 @@ def get_operational_kpis():
     return pipeline.get_operational_kpis()
 
 def get_predictive_alerts():
-    return [alert.to_dict() for alert in pipeline.get_predictive_alerts()]
\ No newline at end of file
+    return [alert.to_dict() for alert in pipeline.get_predictive_alerts()]
+
+def get_scheduler_stats():
+    return scheduler.get_stats() if scheduler else {}
+
+def get_retention_stats():
+    return retention.get_stats() if retention else {}
+
+def get_notification_stats():
+    return dispatcher.get_stats() if dispatcher else {}
+
+def record_collection(bin_id, collected_at=None, weight_kg=None, truck_id=None):
+    return pipeline.record_collection(bin_id, collected_at, weight_kg, truck_id).to_dict()
+
+def record_collections(manifest):
+    return [event.to_dict() for event in pipeline.record_collections(manifest)]
+
+def get_collection_events_since(cursor=0, limit=1000):
+    events, next_cursor = pipeline.collections.events_since(cursor, limit)
+    return [event.to_dict() for event in events], next_cursor
+
+def ingest_readings(readings):
+    return pipeline.ingest_readings(readings)
+
+def get_collection_events(bin_id=None, limit=100):
+    if bin_id:
+        events = pipeline.collections.events_for_bin(bin_id)[-limit:] if limit > 0 else []
+    else:
+        events = pipeline.collections.recent_events(limit)
+    return [event.to_dict() for event in events]
\ No newline at end of file
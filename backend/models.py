@@ -6,6 +6,9 @@ from datetime import datetime
 from typing import Optional
 import json
 
+# Alert severities, most urgent first
+SEVERITY_ORDER = {"critical": 0, "high": 1, "medium": 2, "low": 3}
+
 @dataclass
 class SmartBin:
     """SSA Smart Bin sensor data"""
@@ -54,4 +57,19 @@ class PredictiveAlert:
     def to_dict(self):
         data = asdict(self)
         data['predicted_time'] = self.predicted_time.isoformat()
-        return data
\ No newline at end of file
+        return data
+
+@dataclass
+class CollectionEvent:
+    """Bin pickup recorded by a collection truck"""
+    event_id: str
+    bin_id: str
+    collected_at: datetime
+    weight_kg: float
+    fill_level_before: float
+    truck_id: Optional[str] = None
+    
+    def to_dict(self):
+        data = asdict(self)
+        data['collected_at'] = self.collected_at.isoformat()
+        return data
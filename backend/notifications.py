@@ -0,0 +1,366 @@
+"""
+SSAcity Alert Notifications
+Pushes newly raised PredictiveAlerts to subscribers from an asyncio worker pool,
+with per-destination batching, retries and bounded queues
+"""
+import asyncio
+import functools
+import json
+import queue
+import random
+import smtplib
+import threading
+import time
+import urllib.request
+from collections import Counter, deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from email.message import EmailMessage
+from typing import Dict, List, Optional
+from models import SEVERITY_ORDER
+
+# Alerts moved from the ingress buffer to destination queues between yields to the workers
+FAN_OUT_CHUNK = 100
+
+class Subscriber:
+    """A notification destination; send() delivers one batch of alert dicts or raises"""
+
+    def __init__(self, name: str, min_severity: str = "low"):
+        self.name = name
+        self.min_severity = min_severity
+        # Set by the Destination, so blocking I/O of one subscriber can't occupy another's threads
+        self.executor: Optional[Executor] = None
+
+    async def run_blocking(self, func, *args):
+        """Run a blocking call on this subscriber's own executor"""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, functools.partial(func, *args))
+
+    def accepts(self, alert: Dict) -> bool:
+        return SEVERITY_ORDER.get(alert["severity"], len(SEVERITY_ORDER)) <= SEVERITY_ORDER[self.min_severity]
+
+    async def send(self, alerts: List[Dict]):
+        raise NotImplementedError
+
+class WebhookSubscriber(Subscriber):
+    """POSTs each batch as a JSON array"""
+
+    def __init__(self, url: str, timeout: float = 5.0, headers: Optional[Dict] = None, **kwargs):
+        super().__init__(kwargs.pop("name", url), **kwargs)
+        self.url = url
+        self.timeout = timeout
+        self.headers = dict(headers or {}, **{"Content-Type": "application/json"})
+
+    def _post(self, body: bytes):
+        request = urllib.request.Request(self.url, data=body, headers=self.headers, method="POST")
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+    async def send(self, alerts: List[Dict]):
+        await self.run_blocking(self._post, json.dumps(alerts).encode())
+
+class LocalQueueSubscriber(Subscriber):
+    """Stand-in for a message broker: puts each alert on a bounded in-process queue"""
+
+    def __init__(self, name: str = "local-queue", maxsize: int = 10000, **kwargs):
+        super().__init__(name, **kwargs)
+        self.queue = queue.Queue(maxsize)
+
+    async def send(self, alerts: List[Dict]):
+        if self.queue.maxsize and self.queue.qsize() + len(alerts) > self.queue.maxsize:
+            raise queue.Full(f"{self.name} is full")
+        for alert in alerts:
+            self.queue.put_nowait(alert)
+
+class EmailSubscriber(Subscriber):
+    """Sends one digest email per batch over SMTP"""
+
+    def __init__(self, smtp_host: str, sender: str, recipients: List[str], smtp_port: int = 25,
+                 timeout: float = 10.0, **kwargs):
+        super().__init__(kwargs.pop("name", f"email:{','.join(recipients)}"), **kwargs)
+        self.smtp_host = smtp_host
+        self.smtp_port = smtp_port
+        self.sender = sender
+        self.recipients = recipients
+        self.timeout = timeout
+
+    def _send_mail(self, alerts: List[Dict]):
+        message = EmailMessage()
+        message["From"] = self.sender
+        message["To"] = ", ".join(self.recipients)
+        message["Subject"] = f"SSAcity: {len(alerts)} new alert{'s' if len(alerts) != 1 else ''}"
+        message.set_content("\n".join(
+            f"[{a['severity'].upper()}] {a['type']} at {a['location']} - {a['recommended_action']}"
+            for a in alerts))
+        with smtplib.SMTP(self.smtp_host, self.smtp_port, timeout=self.timeout) as smtp:
+            smtp.send_message(message)
+
+    async def send(self, alerts: List[Dict]):
+        await self.run_blocking(self._send_mail, alerts)
+
+class SmsSubscriber(Subscriber):
+    """Sends a short text per batch through an HTTP SMS gateway"""
+
+    def __init__(self, gateway_url: str, recipients: List[str], api_key: str = "",
+                 timeout: float = 5.0, min_severity: str = "high", **kwargs):
+        super().__init__(kwargs.pop("name", f"sms:{','.join(recipients)}"), min_severity=min_severity, **kwargs)
+        self.gateway_url = gateway_url
+        self.recipients = recipients
+        self.api_key = api_key
+        self.timeout = timeout
+
+    def format(self, alerts: List[Dict]) -> str:
+        first = alerts[0]
+        text = f"SSAcity {first['severity'].upper()}: {first['type']} at {first['location']}"
+        if len(alerts) > 1:
+            text += f" (+{len(alerts) - 1} more)"
+        return text[:160]
+
+    def _post(self, body: bytes):
+        request = urllib.request.Request(self.gateway_url, data=body, method="POST", headers={
+            "Content-Type": "application/json", "Authorization": f"Bearer {self.api_key}"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+    async def send(self, alerts: List[Dict]):
+        body = json.dumps({"to": self.recipients, "message": self.format(alerts)}).encode()
+        await self.run_blocking(self._post, body)
+
+def severity_rank(alert: Dict) -> int:
+    return SEVERITY_ORDER.get(alert.get("severity"), len(SEVERITY_ORDER))
+
+class SeverityBuffer:
+    """Bounded buffer of (published_at, alert) with one FIFO per severity.
+
+    pop() returns the most severe alerts first. When full, the oldest alert of
+    the lowest queued severity is shed to make room, unless the new alert is
+    less severe than everything queued, in which case the new alert is shed.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._queues = [deque() for _ in range(len(SEVERITY_ORDER) + 1)]
+        self._size = 0
+        self.dropped = Counter()
+
+    def __len__(self):
+        return self._size
+
+    def push(self, item) -> bool:
+        """Queue an item; returns False if the buffer was full and an alert (this or an older one) was shed"""
+        rank = severity_rank(item[1])
+        if self._size >= self.maxsize:
+            lowest = max(r for r, q in enumerate(self._queues) if q)
+            if rank > lowest:
+                self.dropped[item[1].get("severity")] += 1
+                return False
+            shed = self._queues[lowest].popleft()
+            self.dropped[shed[1].get("severity")] += 1
+            self._queues[rank].append(item)
+            return False
+        self._queues[rank].append(item)
+        self._size += 1
+        return True
+
+    def pop(self, limit: int) -> List:
+        items = []
+        for q in self._queues:
+            while q and len(items) < limit:
+                items.append(q.popleft())
+        self._size -= len(items)
+        return items
+
+    def has_critical(self) -> bool:
+        return bool(self._queues[0])
+
+    def pressure(self) -> float:
+        """Fill ratio, 0.0 (empty) to 1.0 (shedding)"""
+        return self._size / self.maxsize if self.maxsize else 0.0
+
+class Destination:
+    """Bounded severity buffer, worker pool and delivery metrics for one subscriber"""
+
+    def __init__(self, subscriber: Subscriber, queue_size: int, workers: int, max_batch: int,
+                 max_wait: float, max_retries: int, backoff: float, max_backoff: float):
+        self.subscriber = subscriber
+        subscriber.executor = ThreadPoolExecutor(max_workers=workers,
+                                                 thread_name_prefix=f"notify-{subscriber.name}"[:40])
+        self.buffer = SeverityBuffer(queue_size)
+        self.workers = workers
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._ready: Optional[asyncio.Event] = None
+
+        self.delivered = 0
+        self.failed = 0
+        self.retries = 0
+        self.batches = 0
+        self.latencies = deque(maxlen=10000)
+
+    def enqueue(self, item) -> bool:
+        """Add (published_at, alert); when full, the least severe pending alert is shed"""
+        accepted = self.buffer.push(item)
+        self._ready.set()
+        return accepted
+
+    async def _wait_ready(self, timeout: Optional[float] = None) -> bool:
+        self._ready.clear()
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def _next_batch(self) -> List:
+        """Wait for up to max_batch alerts or max_wait seconds; critical alerts go out at once"""
+        while True:
+            while not len(self.buffer):
+                await self._wait_ready()
+            deadline = time.monotonic() + self.max_wait
+            while len(self.buffer) < self.max_batch and not self.buffer.has_critical():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not await self._wait_ready(remaining):
+                    break
+            # Another worker may have taken everything while this one waited
+            batch = self.buffer.pop(self.max_batch)
+            if batch:
+                return batch
+
+    async def _deliver(self, batch: List) -> bool:
+        alerts = [alert for _, alert in batch]
+        for attempt in range(self.max_retries + 1):
+            try:
+                await self.subscriber.send(alerts)
+                return True
+            except Exception as e:
+                if attempt == self.max_retries:
+                    print(f"Alert delivery to {self.subscriber.name} failed after {attempt + 1} attempts: {e}")
+                    return False
+                self.retries += 1
+                delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+                await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+        return False
+
+    async def worker(self):
+        while True:
+            batch = await self._next_batch()
+            if await self._deliver(batch):
+                now = time.monotonic()
+                self.delivered += len(batch)
+                self.batches += 1
+                self.latencies.extend(now - published for published, _ in batch)
+            else:
+                self.failed += len(batch)
+
+    def get_stats(self):
+        latencies = sorted(self.latencies)
+
+        def pct(p):
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 1) if latencies else 0
+
+        return {
+            "queued": len(self.buffer),
+            "pressure": round(self.buffer.pressure(), 3),
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "retries": self.retries,
+            "dropped": sum(self.buffer.dropped.values()),
+            "dropped_by_severity": dict(self.buffer.dropped),
+            "batches": self.batches,
+            "latency_ms": {"p50": pct(0.50), "p95": pct(0.95), "p99": pct(0.99)}
+        }
+
+class AlertDispatcher:
+    """Fans alerts out to subscribers on its own event loop thread.
+
+    publish() is called from the sensor pipeline and never blocks: it adds the
+    alert to a bounded ingress buffer and wakes the loop. Each destination has
+    its own bounded buffer, so a slow or failing subscriber only backs up its
+    own alerts. Under overload the least severe alerts are shed first;
+    publish() returns False once shedding starts, and pressure() reports how
+    close the fullest buffer is to shedding.
+    """
+
+    def __init__(self, subscribers: Optional[List[Subscriber]] = None, queue_size: int = 5000,
+                 workers: int = 2, max_batch: int = 100, max_wait: float = 1.0, max_retries: int = 5,
+                 backoff: float = 0.5, max_backoff: float = 30.0, ingress_size: int = 50000):
+        self.destinations = [Destination(s, queue_size, workers, max_batch, max_wait, max_retries,
+                                         backoff, max_backoff) for s in (subscribers or [])]
+        self.ingress = SeverityBuffer(ingress_size)
+        self.published = 0
+        self._lock = threading.Lock()
+        self._wake_pending = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._thread = None
+
+    def publish(self, alert) -> bool:
+        """Queue a PredictiveAlert (or alert dict) for delivery; safe to call from any thread.
+
+        Returns False when the dispatcher is saturated and had to shed an alert
+        (this one, or an older one of equal or lower severity).
+        """
+        if not self.destinations:
+            return True
+        item = (time.monotonic(), alert.to_dict() if hasattr(alert, "to_dict") else alert)
+        with self._lock:
+            accepted = self.ingress.push(item)
+            self.published += 1
+            wake = self._loop is not None and not self._wake_pending
+            self._wake_pending = self._wake_pending or wake
+        if wake:
+            self._loop.call_soon_threadsafe(self._wake.set)
+        return accepted
+
+    def pressure(self) -> float:
+        """Fill ratio of the fullest buffer (ingress or any destination), 0.0 to 1.0"""
+        return max([self.ingress.pressure()] + [d.buffer.pressure() for d in self.destinations])
+
+    async def _fan_out(self):
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            with self._lock:
+                items = self.ingress.pop(len(self.ingress))
+                self._wake_pending = False
+            for index, item in enumerate(items, 1):
+                for destination in self.destinations:
+                    if destination.subscriber.accepts(item[1]):
+                        destination.enqueue(item)
+                # Let workers drain between chunks so a burst doesn't overflow fast destinations
+                if index % FAN_OUT_CHUNK == 0:
+                    await asyncio.sleep(0)
+
+    async def _main(self, started: threading.Event):
+        self._wake = asyncio.Event()
+        tasks = [asyncio.create_task(self._fan_out())]
+        for destination in self.destinations:
+            destination._ready = asyncio.Event()
+            tasks.extend(asyncio.create_task(destination.worker()) for _ in range(destination.workers))
+        self._loop = asyncio.get_running_loop()
+        started.set()
+        # Alerts published before the loop was ready
+        self._wake.set()
+        await asyncio.gather(*tasks)
+
+    def start(self):
+        if self._thread or not self.destinations:
+            return
+        started = threading.Event()
+        self._thread = threading.Thread(target=lambda: asyncio.run(self._main(started)), daemon=True)
+        self._thread.start()
+        started.wait(timeout=5)
+
+    def get_stats(self):
+        with self._lock:
+            pending = len(self.ingress)
+            ingress_dropped = dict(self.ingress.dropped)
+        return {
+            "published": self.published,
+            "pressure": round(self.pressure(), 3),
+            "ingress_pending": pending,
+            "ingress_dropped": sum(ingress_dropped.values()),
+            "ingress_dropped_by_severity": ingress_dropped,
+            "destinations": {d.subscriber.name: d.get_stats() for d in self.destinations}
+        }
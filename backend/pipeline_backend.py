@@ -0,0 +1,161 @@
+"""
+SSAcity Pipeline Backend - serves the stateful data pipeline (port 5001)
+"""
+from flask import Flask, jsonify, request
+from flask_cors import CORS
+from werkzeug.serving import WSGIRequestHandler
+from datetime import datetime
+import data_pipeline
+from collection_events import to_local_naive
+
+data_pipeline.start_background_services()
+
+app = Flask(__name__)
+CORS(app)
+
+print("=" * 60)
+print("SSAcity Pipeline Backend - PORT 5001")
+print("=" * 60)
+
+class KeepAliveRequestHandler(WSGIRequestHandler):
+    """Disable Nagle so keep-alive clients don't wait on delayed ACKs between header and body writes"""
+    disable_nagle_algorithm = True
+
+@app.after_request
+def add_etag(response):
+    """Let clients revalidate GETs with If-None-Match and get 304 when nothing changed"""
+    if request.method == 'GET' and response.status_code == 200 and response.is_json:
+        response.add_etag()
+        response = response.make_conditional(request)
+    return response
+
+def non_negative_arg(name, default=None):
+    """Integer query parameter that must be >= 0"""
+    value = request.args.get(name, default, type=int)
+    if value is not None and value < 0:
+        raise ValueError(f"{name} must not be negative")
+    return value
+
+def paginate(items):
+    """Slice a list with ?offset=&limit= and report the full size in X-Total-Count"""
+    try:
+        offset = non_negative_arg('offset', 0)
+        limit = non_negative_arg('limit')
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    page = items[offset:offset + limit] if limit is not None else items[offset:]
+    response = jsonify(page)
+    response.headers['X-Total-Count'] = str(len(items))
+    return response
+
+def parse_manifest_entry(entry):
+    """Convert a JSON manifest entry into record_collection arguments"""
+    if "bin_id" not in entry:
+        raise ValueError("bin_id is required")
+    collected_at = entry.get("collected_at")
+    return {
+        "bin_id": entry["bin_id"],
+        "collected_at": to_local_naive(datetime.fromisoformat(collected_at)) if collected_at else None,
+        "weight_kg": float(entry["weight_kg"]) if entry.get("weight_kg") is not None else None,
+        "truck_id": entry.get("truck_id")
+    }
+
+@app.route('/health')
+def health():
+    return jsonify({
+        "status": "healthy",
+        "message": "Pipeline backend is running",
+        "timestamp": datetime.now().isoformat()
+    })
+
+@app.route('/api/v2/smart-bins')
+def get_smart_bins():
+    return paginate(data_pipeline.get_smart_bins())
+
+@app.route('/api/v2/city-zones')
+def get_city_zones():
+    return jsonify(data_pipeline.get_city_zones())
+
+@app.route('/api/v2/zone-analytics')
+def get_zone_analytics():
+    return jsonify(data_pipeline.get_zone_analytics())
+
+@app.route('/api/v2/platform-metrics')
+def get_platform_metrics():
+    return jsonify(data_pipeline.get_platform_metrics())
+
+@app.route('/api/v2/operational-kpis')
+def get_operational_kpis():
+    return jsonify(data_pipeline.get_operational_kpis())
+
+@app.route('/api/v2/predictive-alerts')
+def get_predictive_alerts():
+    return paginate(data_pipeline.get_predictive_alerts())
+
+@app.route('/api/v2/scheduler-stats')
+def get_scheduler_stats():
+    return jsonify(data_pipeline.get_scheduler_stats())
+
+@app.route('/api/v2/retention-stats')
+def get_retention_stats():
+    return jsonify(data_pipeline.get_retention_stats())
+
+@app.route('/api/v2/notification-stats')
+def get_notification_stats():
+    return jsonify(data_pipeline.get_notification_stats())
+
+@app.route('/api/v2/collections', methods=['GET'])
+def get_collections():
+    """Recent events, or with ?cursor=N the events appended since log position N"""
+    try:
+        limit = non_negative_arg('limit', 100)
+        cursor = non_negative_arg('cursor')
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if cursor is not None:
+        events, next_cursor = data_pipeline.get_collection_events_since(cursor, limit)
+        response = jsonify(events)
+        response.headers['X-Next-Cursor'] = str(next_cursor)
+        return response
+    return jsonify(data_pipeline.get_collection_events(request.args.get('bin_id'), limit))
+
+@app.route('/api/v2/collections', methods=['POST'])
+def post_collections():
+    """Record one pickup ({bin_id, ...}) or a truck manifest ([{bin_id, ...}, ...])"""
+    payload = request.get_json(silent=True)
+    if payload is None:
+        return jsonify({"error": "JSON body required"}), 400
+
+    try:
+        if isinstance(payload, list):
+            events = data_pipeline.record_collections([parse_manifest_entry(e) for e in payload])
+        else:
+            events = [data_pipeline.record_collection(**parse_manifest_entry(payload))]
+    except KeyError as e:
+        return jsonify({"error": str(e).strip("'\"")}), 404
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify(events), 201
+
+@app.route('/api/v2/readings', methods=['POST'])
+def post_readings():
+    """Bulk upload of sensor readings: [{bin_id, fill_level?, temperature?, battery_level?, status?}, ...]"""
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, list):
+        return jsonify({"error": "JSON array of readings required"}), 400
+    try:
+        result = data_pipeline.ingest_readings(payload)
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(result), 202
+
+if __name__ == '__main__':
+    print("\nEndpoints:")
+    print("   http://localhost:5001/health")
+    print("   http://localhost:5001/api/v2/smart-bins")
+    print("   http://localhost:5001/api/v2/operational-kpis")
+    print("   http://localhost:5001/api/v2/collections  (GET, POST)")
+    print("=" * 60)
+    app.run(host='0.0.0.0', port=5001, debug=False, threaded=True,
+            request_handler=KeepAliveRequestHandler)
@@ -0,0 +1,480 @@
+"""
+SSAcity Data Retention
+Segment storage for readings, rollups and alert history with TTLs, compaction and archival
+"""
+import csv
+import gzip
+import io
+import json
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Parquet archives are optional; CSV is always available
+    pyarrow = None
+
+@dataclass
+class RetentionPolicy:
+    """How long a data class stays in the hot store, and what happens after"""
+    ttl: timedelta
+    archive: bool = True
+    archive_format: str = "csv"  # "csv" or "parquet"
+
+DEFAULT_POLICIES = {
+    "readings": RetentionPolicy(ttl=timedelta(days=2)),
+    "rollups": RetentionPolicy(ttl=timedelta(days=90)),
+    "alerts": RetentionPolicy(ttl=timedelta(days=30)),
+    "collections": RetentionPolicy(ttl=timedelta(days=365)),
+}
+
+class IOThrottle:
+    """Token bucket limiting background disk I/O to a number of bytes per second"""
+
+    def __init__(self, bytes_per_second: float, burst: Optional[float] = None):
+        self.rate = bytes_per_second
+        self.capacity = burst or bytes_per_second
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.throttled_seconds = 0.0
+
+    def consume(self, nbytes: int):
+        """Block the calling (background) thread until nbytes of budget are available"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= nbytes
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait:
+            self.throttled_seconds += wait
+            time.sleep(wait)
+
+IO_CHUNK = 64 * 1024
+
+# Records converted to a Parquet row group at a time when archiving
+ARCHIVE_BATCH = 50000
+
+class _ThrottledFile:
+    """File wrapper that charges every read and write to the I/O throttle"""
+
+    def __init__(self, f, throttle: IOThrottle):
+        self._f = f
+        self.throttle = throttle
+
+    def read(self, size: int = IO_CHUNK) -> bytes:
+        data = self._f.read(IO_CHUNK if size is None or size < 0 else size)
+        self.throttle.consume(len(data))
+        return data
+
+    def write(self, data) -> int:
+        view = memoryview(data)
+        for start in range(0, len(view), IO_CHUNK):
+            chunk = view[start:start + IO_CHUNK]
+            self.throttle.consume(len(chunk))
+            self._f.write(chunk)
+        return len(view)
+
+    def flush(self):
+        self._f.flush()
+
+@contextmanager
+def _throttled_output(path: str, throttle: IOThrottle):
+    """Yield a throttled file for a temp path, then fsync and atomically move it into place"""
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, "wb") as f:
+            yield _ThrottledFile(f, throttle)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+def _throttled_write(path: str, data: bytes, throttle: IOThrottle):
+    with _throttled_output(path, throttle) as out:
+        out.write(data)
+
+class Segment:
+    """Segment file named <kind>-<min_ts>-<max_ts>-<seq>.jsonl[.gz]"""
+
+    def __init__(self, path: str):
+        self.path = path
+        name = os.path.basename(path)
+        self.compressed = name.endswith(".gz")
+        kind, min_ts, max_ts, seq = name.split(".")[0].split("-")
+        self.min_ts = int(min_ts)
+        self.max_ts = int(max_ts)
+        self.seq = int(seq)
+        self.size = os.path.getsize(path)
+
+    def lines(self, throttle: IOThrottle) -> Iterator[bytes]:
+        """Stream the segment's non-empty JSON lines, decompressing as it goes"""
+        with open(self.path, "rb") as f:
+            source = _ThrottledFile(f, throttle)
+            if self.compressed:
+                source = gzip.GzipFile(fileobj=source, mode="rb")
+            tail = b""
+            while True:
+                chunk = source.read(IO_CHUNK)
+                if not chunk:
+                    break
+                lines = (tail + chunk).split(b"\n")
+                tail = lines.pop()
+                for line in lines:
+                    if line:
+                        yield line
+            if tail:
+                yield tail
+
+    def records(self, throttle: IOThrottle) -> Iterator[Dict]:
+        """Stream records; malformed lines are skipped so one bad write can't wedge maintenance"""
+        malformed = 0
+        for line in self.lines(throttle):
+            try:
+                yield json.loads(line)
+            except ValueError:
+                malformed += 1
+        if malformed:
+            print(f"Skipped {malformed} malformed records in {self.path}")
+
+class SegmentStore:
+    """Append-only store for one data class.
+
+    Appends only touch an in-memory buffer; all file I/O (flushing,
+    compaction, expiry) happens on the retention thread through the throttle.
+    """
+
+    def __init__(self, directory: str, throttle: IOThrottle, max_buffer: int = 500000,
+                 compact_target_bytes: int = 32 * 1024 * 1024, compact_base_bytes: int = 64 * 1024,
+                 compact_fan_in: int = 8):
+        self.directory = directory
+        self.throttle = throttle
+        self.max_buffer = max_buffer
+        self.compact_target_bytes = compact_target_bytes
+        self.compact_base_bytes = compact_base_bytes
+        self.compact_fan_in = compact_fan_in
+        os.makedirs(directory, exist_ok=True)
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._seq = max((s.seq for s in self.segments()), default=0)
+        self.dropped = 0
+
+    def append(self, record: Dict):
+        """Buffer a record with a 'ts' (epoch seconds) field; never blocks on I/O"""
+        with self._lock:
+            if len(self._buffer) >= self.max_buffer:
+                self.dropped += 1
+                return
+            self._buffer.append(record)
+
+    def _next_path(self, kind: str, min_ts: int, max_ts: int, suffix: str) -> str:
+        """Path for a new segment covering [min_ts, max_ts) in epoch seconds"""
+        self._seq += 1
+        return os.path.join(self.directory, f"{kind}-{min_ts}-{max_ts}-{self._seq}{suffix}")
+
+    def segments(self) -> List[Segment]:
+        """Segment files in time order; files not named like a segment, or removed meanwhile, are ignored"""
+        segments = []
+        for name in os.listdir(self.directory):
+            if not name.endswith((".jsonl", ".jsonl.gz")):
+                continue
+            try:
+                segments.append(Segment(os.path.join(self.directory, name)))
+            except (ValueError, FileNotFoundError):
+                continue  # stray file, or compacted/expired by the retention thread since listdir()
+        return sorted(segments, key=lambda s: s.min_ts)
+
+    def flush(self) -> int:
+        """Write buffered records to a small uncompressed segment"""
+        with self._lock:
+            records, self._buffer = self._buffer, []
+        if not records:
+            return 0
+        data = "".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records).encode()
+        path = self._next_path("raw", int(min(r["ts"] for r in records)),
+                               int(max(r["ts"] for r in records)) + 1, ".jsonl")
+        _throttled_write(path, data, self.throttle)
+        return len(records)
+
+    def _tier(self, segment: Segment) -> int:
+        """Size tier of a compressed segment: 0 below compact_base_bytes, +1 per compact_fan_in multiple"""
+        if segment.size < self.compact_base_bytes:
+            return 0
+        return 1 + int(math.log(segment.size / self.compact_base_bytes, self.compact_fan_in))
+
+    def _group_path(self, group: List[Segment]) -> str:
+        # Time bounds come from the segment names, so merging never has to parse records
+        return self._next_path("seg", min(s.min_ts for s in group), max(s.max_ts for s in group), ".jsonl.gz")
+
+    def _merge_compressed(self, group: List[Segment]):
+        """Concatenate gzip segments into one multi-member gzip file, without decompressing"""
+        with _throttled_output(self._group_path(group), self.throttle) as out:
+            for segment in group:
+                with open(segment.path, "rb") as f:
+                    source = _ThrottledFile(f, self.throttle)
+                    while True:
+                        chunk = source.read(IO_CHUNK)
+                        if not chunk:
+                            break
+                        out.write(chunk)
+        for segment in group:
+            os.remove(segment.path)
+
+    def _merge_raw(self, group: List[Segment], on_record: Optional[Callable[[Dict], None]] = None):
+        """Stream raw segments line by line into one gzip segment, passing each record to on_record"""
+        with _throttled_output(self._group_path(group), self.throttle) as out, \
+                gzip.GzipFile(fileobj=out, mode="wb", compresslevel=6) as compressed:
+            pending, pending_bytes = [], 0
+            for segment in group:
+                for line in segment.lines(self.throttle):
+                    if on_record:
+                        try:
+                            on_record(json.loads(line))
+                        except (ValueError, KeyError, TypeError):
+                            continue  # malformed record: neither rolled up nor kept
+                    pending.append(line)
+                    pending_bytes += len(line) + 1
+                    if pending_bytes >= IO_CHUNK:
+                        compressed.write(b"\n".join(pending) + b"\n")
+                        pending, pending_bytes = [], 0
+            if pending:
+                compressed.write(b"\n".join(pending) + b"\n")
+        for segment in group:
+            os.remove(segment.path)
+
+    def compact(self, on_record: Optional[Callable[[Dict], None]] = None,
+                expiring_before: Optional[float] = None) -> int:
+        """Size-tiered compaction into gzip segments of up to about compact_target_bytes.
+
+        Raw segments are merged once compact_fan_in of them have accumulated, or
+        earlier if one is about to expire (max_ts <= expiring_before) and still
+        needs rolling up; on_record only ever sees these raw records. Compressed
+        segments below the target are merged compact_fan_in at a time with others
+        of the same size tier, so each record is rewritten a bounded number of times.
+        Both paths stream: raw segments line by line, gzip segments as bytes.
+        """
+        segments = self.segments()
+        compacted = 0
+
+        raw = [s for s in segments if not s.compressed]
+        if len(raw) >= self.compact_fan_in or (
+                raw and expiring_before is not None and raw[0].max_ts <= expiring_before):
+            self._merge_raw(raw, on_record)
+            compacted += len(raw)
+
+        tiers = defaultdict(list)
+        for segment in segments:
+            if segment.compressed and segment.size < self.compact_target_bytes:
+                tiers[self._tier(segment)].append(segment)
+        for tier in sorted(tiers):
+            group = tiers[tier]
+            for start in range(0, len(group) - self.compact_fan_in + 1, self.compact_fan_in):
+                self._merge_compressed(group[start:start + self.compact_fan_in])
+                compacted += self.compact_fan_in
+        return compacted
+
+    def expire(self, cutoff: float, archiver: Optional["Archiver"] = None) -> int:
+        """Drop segments entirely older than cutoff, archiving them first if requested"""
+        expired = [s for s in self.segments() if s.max_ts <= cutoff]
+        for segment in expired:
+            if archiver:
+                archiver.archive(os.path.basename(self.directory), segment, self.throttle)
+            os.remove(segment.path)
+        return len(expired)
+
+class Archiver:
+    """Writes expired segments to compressed CSV, or Parquet when pyarrow is installed"""
+
+    def __init__(self, directory: str, archive_format: str = "csv"):
+        self.directory = directory
+        self.archive_format = archive_format if archive_format != "parquet" or pyarrow else "csv"
+        if archive_format == "parquet" and pyarrow is None:
+            print("pyarrow not installed - archiving as compressed CSV instead of Parquet")
+
+    def archive(self, name: str, segment: Segment, throttle: IOThrottle) -> str:
+        """Stream one segment into an archive file; memory stays bounded by ARCHIVE_BATCH records"""
+        target_dir = os.path.join(self.directory, name)
+        os.makedirs(target_dir, exist_ok=True)
+        base = os.path.join(target_dir, f"{name}-{segment.min_ts}-{segment.max_ts}-{segment.seq}")
+
+        if self.archive_format == "parquet":
+            buffer = io.BytesIO()
+            writer = None
+            batch = []
+            for record in segment.records(throttle):
+                batch.append(record)
+                if len(batch) >= ARCHIVE_BATCH:
+                    writer = self._write_parquet_batch(writer, buffer, batch)
+                    batch = []
+            if batch or writer is None:
+                writer = self._write_parquet_batch(writer, buffer, batch)
+            writer.close()
+            path = base + ".parquet"
+            _throttled_write(path, buffer.getvalue(), throttle)
+            return path
+
+        # First pass collects the columns, second pass writes rows
+        fields = set()
+        for record in segment.records(throttle):
+            fields.update(record)
+        path = base + ".csv.gz"
+        with _throttled_output(path, throttle) as out, \
+                gzip.GzipFile(fileobj=out, mode="wb") as compressed, \
+                io.TextIOWrapper(compressed, encoding="utf-8", newline="") as text:
+            writer = csv.DictWriter(text, fieldnames=sorted(fields))
+            writer.writeheader()
+            for record in segment.records(throttle):
+                writer.writerow(record)
+        return path
+
+    def _write_parquet_batch(self, writer, buffer, batch: List[Dict]):
+        table = pyarrow.Table.from_pylist(batch, schema=writer.schema if writer else None)
+        if writer is None:
+            writer = pyarrow.parquet.ParquetWriter(buffer, table.schema, compression="zstd")
+        writer.write_table(table)
+        return writer
+
+class HourlyRollups:
+    """Streaming per-bin hourly aggregates of raw readings; add() one reading at a time"""
+
+    def __init__(self):
+        # (bin_id, hour) -> [samples, fill_sum, max_fill, temperature_sum, min_battery]
+        self._groups: Dict[tuple, list] = {}
+
+    def add(self, r: Dict):
+        key = (r["bin_id"], int(r["ts"] // 3600) * 3600)
+        group = self._groups.get(key)
+        if group is None:
+            self._groups[key] = [1, r["fill_level"], r["fill_level"], r["temperature"], r["battery_level"]]
+        else:
+            group[0] += 1
+            group[1] += r["fill_level"]
+            group[2] = max(group[2], r["fill_level"])
+            group[3] += r["temperature"]
+            group[4] = min(group[4], r["battery_level"])
+
+    def results(self) -> List[Dict]:
+        return [{
+            "ts": hour,
+            "bin_id": bin_id,
+            "samples": samples,
+            "avg_fill_level": round(fill_sum / samples, 2),
+            "max_fill_level": max_fill,
+            "avg_temperature": round(temperature_sum / samples, 2),
+            "min_battery_level": min_battery
+        } for (bin_id, hour), (samples, fill_sum, max_fill, temperature_sum, min_battery) in self._groups.items()]
+
+def hourly_rollups(readings: Iterable[Dict]) -> List[Dict]:
+    """Per-bin hourly aggregates of raw readings"""
+    rollups = HourlyRollups()
+    for r in readings:
+        rollups.add(r)
+    return rollups.results()
+
+class RetentionManager:
+    """Owns the per-class stores and runs flush, compaction and expiry on a background thread"""
+
+    def __init__(self, base_dir: str, policies: Optional[Dict[str, RetentionPolicy]] = None,
+                 bytes_per_second: float = 4 * 1024 * 1024):
+        self.base_dir = base_dir
+        self.policies = dict(policies or DEFAULT_POLICIES)
+        self.throttle = IOThrottle(bytes_per_second)
+        self.stores = {name: SegmentStore(os.path.join(base_dir, "hot", name), self.throttle)
+                       for name in self.policies}
+        self.archivers = {name: Archiver(os.path.join(base_dir, "archive"), policy.archive_format)
+                          for name, policy in self.policies.items() if policy.archive}
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_run = {}
+
+    def record_reading(self, bin):
+        self.stores["readings"].append({
+            "ts": time.time(),
+            "bin_id": bin.bin_id,
+            "fill_level": round(bin.fill_level, 2),
+            "temperature": round(bin.temperature or 0, 2),
+            "battery_level": round(bin.battery_level or 0, 2),
+            "status": bin.status
+        })
+
+    def record_alert(self, alert):
+        self.stores["alerts"].append(dict(alert.to_dict(), ts=time.time()))
+
+    def record_collection(self, event):
+        self.stores["collections"].append(dict(event.to_dict(), ts=event.collected_at.timestamp()))
+
+    def run_maintenance(self, now: Optional[float] = None):
+        """One pass of flush, compaction (rolling up readings) and TTL expiry"""
+        now = now or time.time()
+        started = time.monotonic()
+        flushed = sum(store.flush() for store in self.stores.values())
+
+        cutoffs = {name: now - policy.ttl.total_seconds() for name, policy in self.policies.items()}
+        compacted = 0
+        for name, store in self.stores.items():
+            if name == "readings" and "rollups" in self.stores:
+                rollups = HourlyRollups()
+                compacted += store.compact(rollups.add, expiring_before=cutoffs[name])
+                # An hour split across two compaction groups yields two rows; merge them by `samples`
+                for rollup in rollups.results():
+                    self.stores["rollups"].append(rollup)
+            else:
+                compacted += store.compact()
+        if "rollups" in self.stores:
+            self.stores["rollups"].flush()
+
+        expired = 0
+        for name, store in self.stores.items():
+            expired += store.expire(cutoffs[name], self.archivers.get(name))
+
+        self.last_run = {
+            "flushed_records": flushed,
+            "compacted_segments": compacted,
+            "expired_segments": expired,
+            "duration_seconds": round(time.monotonic() - started, 3)
+        }
+        return self.last_run
+
+    def start(self, interval: float = 60):
+        def loop():
+            while not self._stop.wait(interval):
+                try:
+                    self.run_maintenance()
+                except Exception as e:
+                    print(f"Retention maintenance failed: {e!r}")
+        self._stop.clear()
+        self._thread = threading.Thread(target=loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def get_stats(self):
+        stats = {"throttle_bytes_per_second": self.throttle.rate,
+                 "throttled_seconds": round(self.throttle.throttled_seconds, 2),
+                 "last_run": self.last_run, "stores": {}}
+        for name, store in self.stores.items():
+            segments = store.segments()
+            stats["stores"][name] = {
+                "ttl_hours": self.policies[name].ttl.total_seconds() / 3600,
+                "segments": len(segments),
+                "compressed_segments": len([s for s in segments if s.compressed]),
+                "bytes": sum(s.size for s in segments),
+                "buffered_records": len(store._buffer),
+                "dropped_records": store.dropped
+            }
+        return stats
@@ -0,0 +1,163 @@
+"""
+SSAcity Adaptive Tick Scheduler
+Updates each bin on its own cadence, chosen from how urgent the bin is
+"""
+import heapq
+import threading
+import time
+from collections import Counter
+from typing import Callable, Optional
+
+# Sensor rates in SSAcityDataPipeline.update_bin are expressed per 30-second tick
+BASE_TICK_SECONDS = 30
+
+# Update interval in seconds per tier, from most to least urgent
+CADENCE_TIERS = {
+    "urgent": 5,     # near-full, hot, low battery or not active
+    "elevated": 15,  # filling up
+    "normal": 30,
+    "idle": 120,     # nearly empty
+}
+
+class AdaptiveScheduler:
+    """Min-heap of (due_time, bin) so each step only touches the bins that are due.
+
+    reschedule() may be called from other threads; it supersedes the bin's
+    heap entry, and superseded entries are skipped when popped.
+    """
+
+    def __init__(self, pipeline, cadence_tiers: Optional[dict] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.pipeline = pipeline
+        self.cadence_tiers = dict(cadence_tiers or CADENCE_TIERS)
+        self.clock = clock
+        self._heap = []
+        self._seq = 0
+        self._last_update = {}
+        self._tier_of = {}
+        self._entry = {}  # bin_id -> seq of its current heap entry
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+        # Stats
+        self.started_at = clock()
+        self.steps = 0
+        self.updates = 0
+        self.due_last_step = 0
+        self.max_due_per_step = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+        self.errors = 0
+
+        now = clock()
+        for index, bin in enumerate(pipeline.bins):
+            self._last_update[bin.bin_id] = now
+            # Spread the first round over the base tick so bins don't all fire together
+            self._schedule(bin, now + BASE_TICK_SECONDS * index / max(1, len(pipeline.bins)))
+
+    def tier(self, bin) -> str:
+        """Pick a cadence tier from the bin's current readings"""
+        if (bin.fill_level >= 85 or (bin.temperature or 0) >= 32
+                or (bin.battery_level is not None and bin.battery_level < 20)
+                or bin.status != "active"):
+            return "urgent"
+        if bin.fill_level >= 60:
+            return "elevated"
+        if bin.fill_level >= 20:
+            return "normal"
+        return "idle"
+
+    def _schedule(self, bin, due: Optional[float] = None, now: Optional[float] = None):
+        """Push the bin's heap entry; without `due`, it is next due one cadence of its tier after `now`"""
+        try:
+            tier = self.tier(bin)
+        except Exception:
+            tier = "urgent"
+        self._tier_of[bin.bin_id] = tier
+        if due is None:
+            due = now + self.cadence_tiers[tier]
+        self._entry[bin.bin_id] = self._seq
+        heapq.heappush(self._heap, (due, self._seq, bin))
+        self._seq += 1
+
+    def reschedule(self, bin, now: Optional[float] = None):
+        """Mark a bin as just updated outside the scheduler (e.g. an uploaded reading) and re-tier it"""
+        with self._lock:
+            now = self.clock() if now is None else now
+            self._last_update[bin.bin_id] = now
+            self._schedule(bin, now=now)
+
+    def next_due(self) -> Optional[float]:
+        return self._heap[0][0] if self._heap else None
+
+    def step(self, now: Optional[float] = None) -> int:
+        """Update every bin that is due at `now` and reschedule it; returns the number updated"""
+        now = self.clock() if now is None else now
+        due = 0
+        while True:
+            with self._lock:
+                if not self._heap or self._heap[0][0] > now:
+                    break
+                due_at, seq, bin = heapq.heappop(self._heap)
+                if self._entry.get(bin.bin_id) != seq:
+                    continue  # superseded by reschedule()
+                ticks = (now - self._last_update[bin.bin_id]) / BASE_TICK_SECONDS
+
+            try:
+                self.pipeline.update_bin(bin, ticks)
+                self.pipeline.simulate_collection(bin, ticks)
+                self.pipeline.check_alerts(bin)
+            except Exception as e:
+                self.errors += 1
+                print(f"Sensor update for {bin.bin_id} failed: {e!r}")
+
+            with self._lock:
+                # A reschedule() while this bin was being updated has already re-queued it
+                if self._entry.get(bin.bin_id) == seq:
+                    self._last_update[bin.bin_id] = now
+                    self._schedule(bin, now=now)
+
+            lag = now - due_at
+            self.total_lag += lag
+            self.max_lag = max(self.max_lag, lag)
+            due += 1
+
+        self.steps += 1
+        self.updates += due
+        self.due_last_step = due
+        self.max_due_per_step = max(self.max_due_per_step, due)
+        return due
+
+    def run(self, max_sleep: float = 1.0):
+        """Step whenever bins are due until stop() is called"""
+        while not self._stop.is_set():
+            try:
+                self.step()
+            except Exception as e:
+                print(f"Scheduler step failed: {e!r}")
+            next_due = self.next_due()
+            wait = max_sleep if next_due is None else min(max_sleep, max(0.0, next_due - self.clock()))
+            self._stop.wait(wait)
+
+    def stop(self):
+        self._stop.set()
+
+    def get_stats(self):
+        """Scheduling stats for tuning the latency/CPU trade-off"""
+        uptime = max(1e-9, self.clock() - self.started_at)
+        fixed_loop_updates = len(self._last_update) * uptime / BASE_TICK_SECONDS
+        return {
+            "bins_scheduled": len(self._entry),
+            "bins_per_tier": dict(Counter(self._tier_of.values())),
+            "cadence_seconds": self.cadence_tiers,
+            "steps": self.steps,
+            "updates": self.updates,
+            "updates_per_second": round(self.updates / uptime, 2),
+            "due_last_step": self.due_last_step,
+            "max_due_per_step": self.max_due_per_step,
+            "avg_lag_seconds": round(self.total_lag / self.updates, 3) if self.updates else 0,
+            "max_lag_seconds": round(self.max_lag, 3),
+            "errors": self.errors,
+            "fixed_loop_updates": round(fixed_loop_updates),
+            "uptime_seconds": round(uptime, 1)
+        }
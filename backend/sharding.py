@@ -0,0 +1,278 @@
+"""
+SSAcity Sharded Pipeline
+Partitions the bin fleet by CityZone and runs each zone's pipeline in its own worker
+"""
+import multiprocessing
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional
+from data_pipeline import SSAcityDataPipeline
+from models import SEVERITY_ORDER
+from scheduler import AdaptiveScheduler
+
+UNZONED_SHARD = "UNZONED"
+
+def partition_by_zone(pipeline: SSAcityDataPipeline) -> Dict[str, SSAcityDataPipeline]:
+    """Split a pipeline into one pipeline per zone; unmatched bins go to an UNZONED shard"""
+    shards = {}
+    assigned = set()
+    for zone in pipeline.zones:
+        zone_bins = [b for b in pipeline.zone_bins(zone) if b.bin_id not in assigned]
+        assigned.update(b.bin_id for b in zone_bins)
+        shards[zone.zone_id] = SSAcityDataPipeline(bins=zone_bins, zones=[zone])
+
+    unzoned = [b for b in pipeline.bins if b.bin_id not in assigned]
+    if unzoned:
+        shards[UNZONED_SHARD] = SSAcityDataPipeline(bins=unzoned, zones=[])
+    return shards
+
+class ShardHost:
+    """Owns a group of shards and executes commands against them"""
+
+    def __init__(self, shards: Dict[str, SSAcityDataPipeline]):
+        self.shards = shards
+        self.schedulers: Dict[str, AdaptiveScheduler] = {}
+        self._raised = []
+
+    def tick(self, shard_id: str, pipeline: SSAcityDataPipeline) -> List:
+        """Step the shard's urgency scheduler; returns the alerts raised since the last tick.
+
+        Schedulers are created on first use so they live in the worker process.
+        """
+        scheduler = self.schedulers.get(shard_id)
+        if scheduler is None:
+            scheduler = self.schedulers[shard_id] = AdaptiveScheduler(pipeline)
+            pipeline.alert_listeners.append(self._raised.append)
+        scheduler.step()
+        raised = list(self._raised)
+        self._raised.clear()
+        return raised
+
+    def handle(self, message):
+        """Run (method, shard_id, args, kwargs); shard_id None runs on every shard"""
+        method, shard_id, args, kwargs = message
+        targets = self.shards if shard_id is None else {shard_id: self.shards[shard_id]}
+        results = {}
+        for sid, pipeline in targets.items():
+            if method == "tick":
+                results[sid] = self.tick(sid, pipeline)
+            elif method == "scheduler_stats":
+                results[sid] = self.schedulers[sid].get_stats() if sid in self.schedulers else {}
+            elif method == "bins":
+                results[sid] = [b.to_dict() for b in pipeline.bins]
+            else:
+                results[sid] = getattr(pipeline, method)(*args, **kwargs)
+        return results
+
+class LocalTransport:
+    """In-process stand-in for a network transport; hosts run in the caller's process"""
+
+    def __init__(self, hosts: List[ShardHost]):
+        self.hosts = hosts
+        self._replies = [None] * len(hosts)
+
+    def send(self, worker: int, message):
+        try:
+            self._replies[worker] = ("ok", self.hosts[worker].handle(message))
+        except Exception as e:
+            self._replies[worker] = ("error", e)
+
+    def recv(self, worker: int):
+        reply, self._replies[worker] = self._replies[worker], None
+        return reply
+
+    def close(self):
+        pass
+
+def _serve(conn, host: ShardHost):
+    """Worker process loop: answer commands until a None message arrives"""
+    while True:
+        message = conn.recv()
+        if message is None:
+            break
+        try:
+            conn.send(("ok", host.handle(message)))
+        except Exception as e:
+            conn.send(("error", e))
+    conn.close()
+
+class ProcessTransport:
+    """One long-lived worker process per host, commands sent over pipes.
+
+    Shard state stays inside its worker, so a tick only moves the command
+    and the (small) result across the process boundary.
+    """
+
+    def __init__(self, hosts: List[ShardHost]):
+        self.conns = []
+        self.processes = []
+        for host in hosts:
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_serve, args=(child, host), daemon=True)
+            process.start()
+            child.close()
+            self.conns.append(parent)
+            self.processes.append(process)
+
+    def send(self, worker: int, message):
+        self.conns[worker].send(message)
+
+    def recv(self, worker: int):
+        return self.conns[worker].recv()
+
+    def close(self):
+        for conn in self.conns:
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self.processes:
+            process.join(timeout=5)
+
+class ShardedPipeline:
+    """Coordinator that fans commands out to zone shards and merges the results"""
+
+    def __init__(self, shards: Dict[str, SSAcityDataPipeline], processes: Optional[int] = None,
+                 transport_class=None):
+        if processes is None:
+            processes = min(len(shards), os.cpu_count() or 1)
+        processes = max(1, min(processes, len(shards)))
+
+        # Round-robin shards onto hosts, largest first, to balance bins per worker
+        groups = [{} for _ in range(processes)]
+        for i, sid in enumerate(sorted(shards, key=lambda s: len(shards[s].bins), reverse=True)):
+            groups[i % processes][sid] = shards[sid]
+
+        self.workers = processes
+        self.shard_worker = {sid: w for w, group in enumerate(groups) for sid in group}
+        self.shard_sizes = {sid: len(p.bins) for sid, p in shards.items()}
+        self.bin_shard = {b.bin_id: sid for sid, p in shards.items() for b in p.bins}
+        self.zones = [z for p in shards.values() for z in p.zones]
+
+        if transport_class is None:
+            transport_class = ProcessTransport if processes > 1 else LocalTransport
+        self.transport = transport_class([ShardHost(group) for group in groups])
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self.last_tick_seconds = 0.0
+
+        # Called on the coordinator with each PredictiveAlert raised inside a shard
+        self.alert_listeners = []
+
+    @classmethod
+    def from_pipeline(cls, pipeline: SSAcityDataPipeline, processes: Optional[int] = None,
+                      transport_class=None):
+        return cls(partition_by_zone(pipeline), processes, transport_class)
+
+    def _broadcast(self, method: str, *args, **kwargs) -> Dict[str, object]:
+        """Send a command to every worker in parallel and collect per-shard results"""
+        results = {}
+        with self._lock:
+            workers = range(self.workers)
+            for w in workers:
+                self.transport.send(w, (method, None, args, kwargs))
+            errors = []
+            for w in workers:
+                status, payload = self.transport.recv(w)
+                if status == "ok":
+                    results.update(payload)
+                else:
+                    errors.append(payload)
+        if errors:
+            raise errors[0]
+        return results
+
+    def _call(self, shard_id: str, method: str, *args, **kwargs):
+        worker = self.shard_worker[shard_id]
+        with self._lock:
+            self.transport.send(worker, (method, shard_id, args, kwargs))
+            status, payload = self.transport.recv(worker)
+        if status != "ok":
+            raise payload
+        return payload[shard_id]
+
+    def tick(self):
+        """Step every shard's scheduler in parallel and pass raised alerts to alert_listeners"""
+        start = time.perf_counter()
+        raised = self._broadcast("tick")
+        self.last_tick_seconds = time.perf_counter() - start
+        for alerts in raised.values():
+            for alert in alerts:
+                for listener in self.alert_listeners:
+                    listener(alert)
+
+    def start(self, interval: float = 1.0):
+        """Run the tick loop in a background thread"""
+        def loop():
+            while not self._stop.wait(interval):
+                try:
+                    self.tick()
+                except Exception as e:
+                    print(f"Shard tick failed: {e!r}")
+        self._stop.clear()
+        self._thread = threading.Thread(target=loop, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self.transport.close()
+
+    def record_collection(self, bin_id: str, collected_at: Optional[datetime] = None,
+                          weight_kg: Optional[float] = None, truck_id: Optional[str] = None):
+        if bin_id not in self.bin_shard:
+            raise KeyError(f"Unknown bin: {bin_id}")
+        return self._call(self.bin_shard[bin_id], "record_collection",
+                          bin_id, collected_at, weight_kg, truck_id)
+
+    def record_collections(self, manifest: List[Dict]):
+        """Record a truck manifest, sending each shard its own entries in one call"""
+        unknown = [e["bin_id"] for e in manifest if e["bin_id"] not in self.bin_shard]
+        if unknown:
+            raise KeyError(f"Unknown bins: {', '.join(unknown)}")
+
+        by_shard = defaultdict(list)
+        for entry in manifest:
+            by_shard[self.bin_shard[entry["bin_id"]]].append(entry)
+        events = []
+        for shard_id, entries in by_shard.items():
+            events.extend(self._call(shard_id, "record_collections", entries))
+        return sorted(events, key=lambda e: e.collected_at)
+
+    def get_scheduler_stats(self):
+        return self._broadcast("scheduler_stats")
+
+    def get_smart_bins(self):
+        return [b for bins in self._broadcast("bins").values() for b in bins]
+
+    def get_zone_analytics(self):
+        analytics = [a for shard in self._broadcast("get_zone_analytics").values() for a in shard]
+        return sorted(analytics, key=lambda a: a["zone_id"])
+
+    def get_predictive_alerts(self):
+        alerts = [a for shard in self._broadcast("get_predictive_alerts").values() for a in shard]
+        return sorted(alerts, key=lambda a: SEVERITY_ORDER.get(a.severity, len(SEVERITY_ORDER)))
+
+    def get_operational_kpis(self):
+        """Merge shard KPIs: counts are summed, percentages weighted by shard bin count"""
+        per_shard = self._broadcast("get_operational_kpis")
+        total_bins = sum(self.shard_sizes.values())
+
+        def weighted(key):
+            if not total_bins:
+                return 0
+            return round(sum(k[key] * self.shard_sizes[sid] for sid, k in per_shard.items()) / total_bins, 1)
+
+        return {
+            "total_collections_today": sum(k["total_collections_today"] for k in per_shard.values()),
+            "total_waste_collected_kg": round(sum(k["total_waste_collected_kg"] for k in per_shard.values()), 1),
+            "avg_route_efficiency": weighted("avg_route_efficiency"),
+            "bins_above_80": sum(k["bins_above_80"] for k in per_shard.values()),
+            "bins_offline": sum(k["bins_offline"] for k in per_shard.values()),
+            "collection_coverage": weighted("collection_coverage")
+        }
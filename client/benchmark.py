@@ -0,0 +1,111 @@
+"""
+SSAcity client throughput benchmark
+
+Compares a fresh connection per request (what consumers hand-roll today)
+with the pooled sync and asyncio clients, against a local pipeline backend.
+
+    python client/benchmark.py                  # starts backend/pipeline_backend.py in-process
+    python client/benchmark.py --url http://localhost:5001
+
+Servers given with --url should disable Nagle's algorithm on accepted sockets
+(pipeline_backend.py does); otherwise keep-alive requests stall on delayed ACKs.
+"""
+import argparse
+import asyncio
+import http.client
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from ssacity_client import AsyncSSAcityClient, ETagCache, SSAcityClient
+from ssacity_client._http import parse_base_url
+
+PATH = "/api/v2/operational-kpis"
+
+def start_local_backend(port: int) -> str:
+    """Serve backend/pipeline_backend.py from a background thread"""
+    backend_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+    sys.path.insert(0, backend_dir)
+    from werkzeug.serving import make_server
+    import pipeline_backend
+
+    server = make_server("127.0.0.1", port, pipeline_backend.app, threaded=True,
+                         request_handler=pipeline_backend.KeepAliveRequestHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{port}"
+
+def report(name: str, latencies, elapsed: float):
+    latencies = sorted(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{name:<28} {len(latencies) / elapsed:>9.1f} req/s   "
+          f"p50 {statistics.median(latencies) * 1000:>6.2f} ms   p99 {p99 * 1000:>6.2f} ms")
+
+def bench_fresh_connections(url: str, requests: int, concurrency: int):
+    host, port, prefix = parse_base_url(url)
+
+    def one(_):
+        start = time.perf_counter()
+        conn = http.client.HTTPConnection(host, port, timeout=10)
+        conn.request("GET", prefix + PATH)
+        conn.getresponse().read()
+        conn.close()
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        latencies = list(pool.map(one, range(requests)))
+    report("fresh connection per call", latencies, time.perf_counter() - start)
+
+def bench_sync_client(url: str, requests: int, concurrency: int, cache: bool):
+    client = SSAcityClient(url, pool_size=concurrency, cache=None if cache else ETagCache(0))
+
+    def one(_):
+        start = time.perf_counter()
+        client.request("GET", PATH)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        latencies = list(pool.map(one, range(requests)))
+    report(f"sync pooled{' + etag' if cache else ''}", latencies, time.perf_counter() - start)
+    print(f"{'':<28} connections opened: {client.pool.created}")
+    client.close()
+
+async def bench_async_client(url: str, requests: int, concurrency: int, cache: bool):
+    async with AsyncSSAcityClient(url, pool_size=concurrency, cache=None if cache else ETagCache(0)) as client:
+        latencies = []
+
+        async def worker(count):
+            for _ in range(count):
+                start = time.perf_counter()
+                await client.request("GET", PATH)
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(requests // concurrency + (i < requests % concurrency))
+                               for i in range(concurrency)))
+        report(f"async pooled{' + etag' if cache else ''}", latencies, time.perf_counter() - start)
+        print(f"{'':<28} connections opened: {client.pool.created}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Benchmark an already running backend instead of starting one")
+    parser.add_argument("--port", type=int, default=5051, help="Port for the in-process backend")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    url = args.url or start_local_backend(args.port)
+    print(f"Benchmarking GET {PATH} on {url}: {args.requests} requests, concurrency {args.concurrency}")
+    bench_fresh_connections(url, args.requests, args.concurrency)
+    bench_sync_client(url, args.requests, args.concurrency, cache=False)
+    bench_sync_client(url, args.requests, args.concurrency, cache=True)
+    asyncio.run(bench_async_client(url, args.requests, args.concurrency, cache=False))
+    asyncio.run(bench_async_client(url, args.requests, args.concurrency, cache=True))
+
+if __name__ == '__main__':
+    main()
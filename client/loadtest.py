@@ -0,0 +1,251 @@
+"""
+SSAcity dashboard load test
+
+Simulates thousands of dashboard browsers with asyncio. Each client keeps one
+keep-alive connection and, every refresh interval, replays its dashboard's
+refresh cycle in order (as dashboard.js / ssacity-v2.js do). Some cycles also
+open a region drill-down or the historical view. Clients are added in steps
+to produce a saturation curve: throughput, tail latency and error rate per
+client count.
+
+    python client/loadtest.py --backend all --steps 50,200,500,1000,2000
+    python client/loadtest.py --url http://localhost:5000 --profile app --steps 500
+"""
+import argparse
+import asyncio
+import csv
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+import urllib.request
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from ssacity_client.aio import AsyncConnectionPool
+from ssacity_client._http import parse_base_url
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@dataclass
+class Profile:
+    """How one backend's dashboard polls it"""
+    script: str
+    cycle: List[str]
+    drilldowns: List[str] = field(default_factory=list)
+    historical: List[str] = field(default_factory=list)
+
+PROFILES = {
+    "app": Profile(
+        script="app.py",
+        cycle=["/dashboard", "/alerts", "/predictions"],
+        drilldowns=[f"/region/{r}" for r in ["Downtown", "Uptown", "Industrial", "Residential", "Commercial"]],
+        historical=["/historical"]
+    ),
+    "simple": Profile(
+        script="backend/simple_backend.py",
+        cycle=["/health", "/api/v2/smart-bins", "/api/v2/predictive-alerts", "/api/v2/operational-kpis"]
+    ),
+    "working": Profile(
+        script="backend/working_backend.py",
+        cycle=["/health", "/api/v2/smart-bins", "/api/v2/predictive-alerts", "/api/v2/operational-kpis"]
+    ),
+    "pipeline": Profile(
+        script="backend/pipeline_backend.py",
+        cycle=["/api/v2/smart-bins", "/api/v2/operational-kpis", "/api/v2/zone-analytics",
+               "/api/v2/platform-metrics", "/api/v2/predictive-alerts"],
+        drilldowns=[f"/api/v2/collections?bin_id=BIN_{i:03d}" for i in range(1, 11)]
+    ),
+}
+
+class Stats:
+    """Request outcomes bucketed per second"""
+
+    def __init__(self):
+        self.buckets: Dict[int, dict] = {}
+
+    def record(self, latency: Optional[float], ok: bool):
+        second = int(time.monotonic())
+        bucket = self.buckets.setdefault(second, {"latencies": [], "errors": 0})
+        if ok:
+            bucket["latencies"].append(latency)
+        else:
+            bucket["errors"] += 1
+
+    def summarize(self, start: float, end: float) -> dict:
+        latencies, errors = [], 0
+        for second, bucket in self.buckets.items():
+            if start <= second < end:
+                latencies.extend(bucket["latencies"])
+                errors += bucket["errors"]
+        total = len(latencies) + errors
+        latencies.sort()
+
+        def pct(p):
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else 0.0
+
+        return {
+            "requests": total,
+            "throughput": total / max(1e-9, end - start),
+            "p50_ms": pct(0.50), "p95_ms": pct(0.95), "p99_ms": pct(0.99),
+            "error_rate": errors / total if total else 0.0
+        }
+
+async def dashboard_client(url: str, profile: Profile, stats: Stats, stop: asyncio.Event,
+                           refresh: float, drilldown_rate: float, historical_rate: float, timeout: float):
+    """One browser tab: refresh cycle every `refresh` seconds, starting at a random offset"""
+    host, port, prefix = parse_base_url(url)
+    pool = AsyncConnectionPool(host, port, maxsize=1, timeout=timeout)
+    try:
+        await asyncio.wait_for(stop.wait(), random.uniform(0, refresh))
+        return
+    except asyncio.TimeoutError:
+        pass
+
+    while not stop.is_set():
+        started = time.monotonic()
+        paths = list(profile.cycle)
+        if profile.drilldowns and random.random() < drilldown_rate:
+            paths.append(random.choice(profile.drilldowns))
+        if profile.historical and random.random() < historical_rate:
+            paths.extend(profile.historical)
+
+        for path in paths:
+            if stop.is_set():
+                break
+            request_start = time.monotonic()
+            try:
+                response = await pool.request("GET", prefix + path, None, {})
+                stats.record(time.monotonic() - request_start, response.status < 400)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+                stats.record(None, False)
+
+        try:
+            await asyncio.wait_for(stop.wait(), max(0.0, refresh - (time.monotonic() - started)))
+        except asyncio.TimeoutError:
+            pass
+    pool.close()
+
+async def run_steps(url: str, profile: Profile, steps: List[int], step_duration: float, refresh: float,
+                    drilldown_rate: float, historical_rate: float, timeout: float) -> List[dict]:
+    """Grow the client population step by step; measure each step after a warm-up of one refresh"""
+    stats = Stats()
+    stop = asyncio.Event()
+    clients = []
+    curve = []
+    for target in steps:
+        while len(clients) < target:
+            clients.append(asyncio.create_task(dashboard_client(
+                url, profile, stats, stop, refresh, drilldown_rate, historical_rate, timeout)))
+
+        await asyncio.sleep(refresh)  # every client has started and completed one cycle
+        measure_start = int(time.monotonic()) + 1
+        for _ in range(int(step_duration)):
+            await asyncio.sleep(1)
+            now = int(time.monotonic())
+            window = stats.summarize(now - 1, now)
+            print(f"  clients {target:>6}  {window['throughput']:>8.1f} req/s  "
+                  f"p99 {window['p99_ms']:>8.1f} ms  errors {window['error_rate'] * 100:>5.1f}%")
+        summary = stats.summarize(measure_start, int(time.monotonic()))
+        summary["clients"] = target
+        curve.append(summary)
+
+    stop.set()
+    await asyncio.gather(*clients, return_exceptions=True)
+    return curve
+
+def raise_fd_limit():
+    """Each simulated client holds a socket; lift the soft open-file limit to the hard limit"""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+LAUNCHER = """
+import runpy, sys
+sys.path.insert(0, {directory!r})
+namespace = runpy.run_path({script!r}, run_name='loadtest')
+namespace['app'].run(host='127.0.0.1', port={port}, debug=False, threaded=True)
+"""
+
+def start_backend(profile: Profile, port: int) -> subprocess.Popen:
+    """Run a backend's Flask app (without its __main__ block) and wait for /health"""
+    script = os.path.join(ROOT, profile.script)
+    directory = os.path.dirname(script)
+    process = subprocess.Popen(
+        [sys.executable, "-c", LAUNCHER.format(directory=directory, script=script, port=port)],
+        cwd=directory, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1).read()
+            return process
+        except OSError:
+            if process.poll() is not None:
+                raise RuntimeError(f"{profile.script} exited during startup")
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"{profile.script} did not become healthy on port {port}")
+
+def print_curve(name: str, curve: List[dict]):
+    print(f"\nSaturation curve - {name}")
+    print(f"{'Clients':>8} {'Req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'Errors':>8}")
+    for row in curve:
+        print(f"{row['clients']:>8} {row['throughput']:>9.1f} {row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} "
+              f"{row['p99_ms']:>8.1f} {row['error_rate'] * 100:>7.1f}%")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", default="all", choices=sorted(PROFILES) + ["all"],
+                        help="Backend to start and test")
+    parser.add_argument("--url", help="Test an already running instance (use with --profile)")
+    parser.add_argument("--profile", default="app", choices=sorted(PROFILES), help="Polling pattern for --url")
+    parser.add_argument("--steps", default="50,200,500,1000", help="Comma-separated client counts")
+    parser.add_argument("--step-duration", type=float, default=20, help="Seconds measured per step")
+    parser.add_argument("--refresh", type=float, default=30, help="Dashboard refresh interval in seconds")
+    parser.add_argument("--drilldown-rate", type=float, default=0.2, help="Share of cycles with a drill-down")
+    parser.add_argument("--historical-rate", type=float, default=0.1, help="Share of cycles opening history")
+    parser.add_argument("--timeout", type=float, default=10)
+    parser.add_argument("--port", type=int, default=5090)
+    parser.add_argument("--csv", help="Write the saturation curves to this CSV file")
+    args = parser.parse_args()
+
+    raise_fd_limit()
+    steps = [int(s) for s in args.steps.split(",")]
+    if args.url:
+        targets = [(args.profile, args.url, None)]
+    else:
+        names = list(PROFILES) if args.backend == "all" else [args.backend]
+        targets = [(name, None, PROFILES[name]) for name in names]
+
+    rows = []
+    for name, url, profile in targets:
+        process = None
+        if url is None:
+            print(f"Starting {profile.script} on port {args.port}")
+            process = start_backend(profile, args.port)
+            url = f"http://127.0.0.1:{args.port}"
+        try:
+            print(f"Load testing {name} at {url}")
+            curve = asyncio.run(run_steps(url, PROFILES[name], steps, args.step_duration, args.refresh,
+                                          args.drilldown_rate, args.historical_rate, args.timeout))
+        finally:
+            if process:
+                process.terminate()
+                process.wait(timeout=10)
+        print_curve(name, curve)
+        rows.extend({k: round(v, 3) if isinstance(v, float) else v for k, v in dict(row, backend=name).items()}
+                    for row in curve)
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=["backend", "clients", "requests", "throughput",
+                                                   "p50_ms", "p95_ms", "p99_ms", "error_rate"])
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"\nWrote {args.csv}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,9 @@
+"""
+SSAcity API client
+Sync and asyncio clients for the /api/v2 endpoints, with keep-alive pooling and ETag caching
+"""
+from ._http import ETagCache, Response, SSAcityAPIError
+from .aio import AsyncSSAcityClient
+from .sync import SSAcityClient
+
+__all__ = ["AsyncSSAcityClient", "ETagCache", "Response", "SSAcityAPIError", "SSAcityClient"]
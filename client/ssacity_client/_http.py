@@ -0,0 +1,102 @@
+"""
+Shared request/response helpers for the sync and async clients
+"""
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+class SSAcityAPIError(Exception):
+    """Non-2xx response from the SSAcity API"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"HTTP {status}: {message}")
+        self.status = status
+        self.message = message
+
+class Response:
+    """Decoded API response"""
+
+    def __init__(self, status: int, headers: Dict[str, str], body: bytes):
+        self.status = status
+        self.headers = {k.lower(): v for k, v in headers.items()}
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body) if self.body else None
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            try:
+                message = self.json().get("error", self.body.decode(errors="replace"))
+            except (ValueError, AttributeError):
+                message = self.body.decode(errors="replace")
+            raise SSAcityAPIError(self.status, message)
+
+class ETagCache:
+    """Bounded LRU of GET responses keyed by path+query, revalidated with If-None-Match"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[str, Response]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def etag_for(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[0] if entry else None
+
+    def store(self, key: str, response: Response):
+        etag = response.headers.get("etag")
+        if not etag or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (etag, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def revalidated(self, key: str) -> Optional[Response]:
+        """Cached response for a 304 answer"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            return None
+
+    def record_miss(self):
+        with self._lock:
+            self.misses += 1
+
+def parse_base_url(base_url: str) -> Tuple[str, int, str]:
+    """Split http://host:port/prefix into (host, port, prefix)"""
+    parts = urlsplit(base_url)
+    if parts.scheme not in ("http", ""):
+        raise ValueError("Only plain http base URLs are supported")
+    return parts.hostname or "localhost", parts.port or 80, parts.path.rstrip("/")
+
+def build_target(prefix: str, path: str, params: Optional[Dict] = None) -> str:
+    """Path plus query string, dropping parameters that are None"""
+    query = {k: v for k, v in (params or {}).items() if v is not None}
+    target = prefix + path
+    return f"{target}?{urlencode(query)}" if query else target
+
+def encode_body(payload) -> Tuple[Optional[bytes], Dict[str, str]]:
+    if payload is None:
+        return None, {}
+    body = json.dumps(payload, default=_json_default).encode()
+    return body, {"Content-Type": "application/json", "Content-Length": str(len(body))}
+
+def _json_default(value):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+def chunked(items, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
@@ -0,0 +1,247 @@
+"""
+asyncio SSAcity API client with a keep-alive connection pool
+"""
+import asyncio
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from ._http import (ETagCache, Response, build_target, chunked, encode_body,
+                    parse_base_url)
+
+class _Connection:
+    """One HTTP/1.1 connection over asyncio streams"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.reusable = True
+
+    @classmethod
+    async def open(cls, host: str, port: int):
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def request(self, method: str, target: str, host: str, body: Optional[bytes],
+                      headers: Dict[str, str]) -> Response:
+        lines = [f"{method} {target} HTTP/1.1", f"Host: {host}", "Connection: keep-alive"]
+        if body is None and method != "GET":
+            headers = dict(headers, **{"Content-Length": "0"})
+        lines.extend(f"{k}: {v}" for k, v in headers.items())
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + (body or b""))
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Server closed the connection")
+        version, status = status_line.decode("latin-1").split(" ", 2)[:2]
+
+        response_headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            response_headers[name.strip()] = value.strip()
+        lowered = {k.lower(): v for k, v in response_headers.items()}
+
+        if lowered.get("transfer-encoding", "").lower() == "chunked":
+            data = await self._read_chunked()
+        elif "content-length" in lowered:
+            data = await self.reader.readexactly(int(lowered["content-length"]))
+        elif int(status) in (204, 304) or method == "HEAD":
+            data = b""
+        else:
+            data = await self.reader.read()
+            self.reusable = False
+
+        if lowered.get("connection", "").lower() == "close" or version == "HTTP/1.0":
+            self.reusable = False
+        return Response(int(status), response_headers, data)
+
+    async def _read_chunked(self) -> bytes:
+        parts = []
+        while True:
+            size = int((await self.reader.readline()).split(b";")[0].strip(), 16)
+            if size == 0:
+                # Skip trailers
+                while (await self.reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return b"".join(parts)
+            parts.append(await self.reader.readexactly(size))
+            await self.reader.readline()
+
+    def close(self):
+        self.writer.close()
+
+class AsyncConnectionPool:
+    """At most `maxsize` concurrent connections; idle ones are reused LIFO"""
+
+    def __init__(self, host: str, port: int, maxsize: int = 10, timeout: float = 10.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.maxsize = maxsize
+        self._idle: List[_Connection] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop = None
+        self.created = 0
+
+    def _slots_for_running_loop(self) -> asyncio.Semaphore:
+        """Create the semaphore inside the running loop; before Python 3.10 it binds to a loop on creation"""
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._loop is not loop:
+            # Connections opened on another (possibly closed) loop can't be used from this one
+            while self._idle:
+                try:
+                    self._idle.pop().close()
+                except RuntimeError:
+                    pass
+            self._slots = asyncio.Semaphore(self.maxsize)
+            self._loop = loop
+        return self._slots
+
+    async def request(self, method: str, target: str, body: Optional[bytes],
+                      headers: Dict[str, str]) -> Response:
+        async with self._slots_for_running_loop():
+            for attempt in range(2):
+                reused = bool(self._idle)
+                if reused:
+                    conn = self._idle.pop()
+                else:
+                    self.created += 1
+                    conn = await asyncio.wait_for(_Connection.open(self.host, self.port), self.timeout)
+                try:
+                    response = await asyncio.wait_for(
+                        conn.request(method, target, f"{self.host}:{self.port}", body, headers), self.timeout)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    conn.close()
+                    # Only retry idempotent requests, and only when a pooled connection went stale
+                    if reused and attempt == 0 and method == "GET":
+                        continue
+                    raise
+                except BaseException:
+                    conn.close()
+                    raise
+                if conn.reusable:
+                    self._idle.append(conn)
+                else:
+                    conn.close()
+                return response
+
+    def close(self):
+        while self._idle:
+            self._idle.pop().close()
+
+class AsyncSSAcityClient:
+    """asyncio client for the /api/v2 endpoints of the SSAcity pipeline backend"""
+
+    def __init__(self, base_url: str = "http://localhost:5001", pool_size: int = 10,
+                 timeout: float = 10.0, cache: Optional[ETagCache] = None):
+        host, port, self.prefix = parse_base_url(base_url)
+        self.pool = AsyncConnectionPool(host, port, pool_size, timeout)
+        self.cache = cache if cache is not None else ETagCache()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        self.pool.close()
+
+    async def request(self, method: str, path: str, params: Optional[Dict] = None, payload=None) -> Response:
+        target = build_target(self.prefix, path, params)
+        body, headers = encode_body(payload)
+
+        etag = self.cache.etag_for(target) if method == "GET" else None
+        if etag:
+            headers["If-None-Match"] = etag
+
+        response = await self.pool.request(method, target, body, headers)
+        if response.status == 304:
+            cached = self.cache.revalidated(target)
+            if cached is not None:
+                return cached
+        response.raise_for_status()
+        if method == "GET":
+            self.cache.record_miss()
+            self.cache.store(target, response)
+        return response
+
+    async def _get(self, path: str, **params):
+        return (await self.request("GET", path, params)).json()
+
+    # Read endpoints
+
+    async def get_smart_bins(self, offset: Optional[int] = None, limit: Optional[int] = None) -> List[Dict]:
+        return await self._get("/api/v2/smart-bins", offset=offset, limit=limit)
+
+    async def get_city_zones(self) -> List[Dict]:
+        return await self._get("/api/v2/city-zones")
+
+    async def get_zone_analytics(self) -> List[Dict]:
+        return await self._get("/api/v2/zone-analytics")
+
+    async def get_platform_metrics(self) -> Dict:
+        return await self._get("/api/v2/platform-metrics")
+
+    async def get_operational_kpis(self) -> Dict:
+        return await self._get("/api/v2/operational-kpis")
+
+    async def get_predictive_alerts(self, offset: Optional[int] = None, limit: Optional[int] = None) -> List[Dict]:
+        return await self._get("/api/v2/predictive-alerts", offset=offset, limit=limit)
+
+    async def get_scheduler_stats(self) -> Dict:
+        return await self._get("/api/v2/scheduler-stats")
+
+    async def get_collections(self, bin_id: Optional[str] = None, limit: int = 100) -> List[Dict]:
+        return await self._get("/api/v2/collections", bin_id=bin_id, limit=limit)
+
+    # Pagination and delta helpers
+
+    async def iter_pages(self, path: str, page_size: int = 500) -> AsyncIterator[List[Dict]]:
+        """Yield pages of an offset/limit endpoint until X-Total-Count is reached"""
+        offset = 0
+        while True:
+            response = await self.request("GET", path, {"offset": offset, "limit": page_size})
+            page = response.json()
+            if page:
+                yield page
+            offset += len(page)
+            total = int(response.headers.get("x-total-count", offset))
+            if not page or offset >= total:
+                break
+
+    async def iter_smart_bins(self, page_size: int = 500) -> AsyncIterator[Dict]:
+        async for page in self.iter_pages("/api/v2/smart-bins", page_size):
+            for bin in page:
+                yield bin
+
+    async def collections_since(self, cursor: int = 0, limit: int = 1000) -> Tuple[List[Dict], int]:
+        """Collection events appended since `cursor`, and the cursor for the next call"""
+        response = await self.request("GET", "/api/v2/collections", {"cursor": cursor, "limit": limit})
+        return response.json(), int(response.headers.get("x-next-cursor", cursor))
+
+    # Write endpoints
+
+    async def record_collection(self, bin_id: str, collected_at=None, weight_kg: Optional[float] = None,
+                                truck_id: Optional[str] = None) -> Dict:
+        payload = {"bin_id": bin_id, "collected_at": collected_at, "weight_kg": weight_kg, "truck_id": truck_id}
+        return (await self.request("POST", "/api/v2/collections", payload=payload)).json()[0]
+
+    async def record_collections(self, manifest: List[Dict]) -> List[Dict]:
+        return (await self.request("POST", "/api/v2/collections", payload=manifest)).json()
+
+    async def upload_readings(self, readings: List[Dict], batch_size: int = 1000,
+                              concurrency: int = 4) -> Dict:
+        """Upload readings in batches, `concurrency` batches in flight at once"""
+        limit = asyncio.Semaphore(concurrency)
+
+        async def send(batch):
+            async with limit:
+                return (await self.request("POST", "/api/v2/readings", payload=batch)).json()
+
+        replies = await asyncio.gather(*(send(batch) for batch in chunked(readings, batch_size)))
+        return {
+            "applied": sum(r["applied"] for r in replies),
+            "unknown_bins": [b for r in replies for b in r["unknown_bins"]]
+        }
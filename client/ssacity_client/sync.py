@@ -0,0 +1,174 @@
+"""
+Blocking SSAcity API client with a keep-alive connection pool
+"""
+import http.client
+import queue
+from typing import Dict, Iterator, List, Optional, Tuple
+from ._http import (ETagCache, Response, build_target, chunked, encode_body,
+                    parse_base_url)
+
+# Errors raised when a pooled keep-alive connection was closed by the server
+STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, BrokenPipeError,
+                           ConnectionResetError, http.client.CannotSendRequest)
+
+class ConnectionPool:
+    """Thread-safe LIFO pool of persistent HTTP/1.1 connections to one host"""
+
+    def __init__(self, host: str, port: int, maxsize: int = 10, timeout: float = 10.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize)
+        self.created = 0
+
+    def acquire(self) -> Tuple[http.client.HTTPConnection, bool]:
+        """Return (connection, reused)"""
+        try:
+            return self._idle.get_nowait(), True
+        except queue.Empty:
+            self.created += 1
+            return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout), False
+
+    def release(self, conn: http.client.HTTPConnection, reusable: bool = True):
+        if not reusable:
+            conn.close()
+            return
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+class SSAcityClient:
+    """Client for the /api/v2 endpoints of the SSAcity pipeline backend"""
+
+    def __init__(self, base_url: str = "http://localhost:5001", pool_size: int = 10,
+                 timeout: float = 10.0, cache: Optional[ETagCache] = None):
+        host, port, self.prefix = parse_base_url(base_url)
+        self.pool = ConnectionPool(host, port, pool_size, timeout)
+        self.cache = cache if cache is not None else ETagCache()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.pool.close()
+
+    def _send(self, method: str, target: str, body: Optional[bytes], headers: Dict[str, str]) -> Response:
+        for attempt in range(2):
+            conn, reused = self.pool.acquire()
+            try:
+                conn.request(method, target, body=body, headers=headers)
+                raw = conn.getresponse()
+                data = raw.read()
+            except STALE_CONNECTION_ERRORS:
+                self.pool.release(conn, reusable=False)
+                # Only retry idempotent requests, and only when a pooled connection went stale
+                if reused and attempt == 0 and method == "GET":
+                    continue
+                raise
+            except Exception:
+                self.pool.release(conn, reusable=False)
+                raise
+            self.pool.release(conn, reusable=not raw.will_close)
+            return Response(raw.status, dict(raw.getheaders()), data)
+
+    def request(self, method: str, path: str, params: Optional[Dict] = None, payload=None) -> Response:
+        target = build_target(self.prefix, path, params)
+        body, headers = encode_body(payload)
+
+        etag = self.cache.etag_for(target) if method == "GET" else None
+        if etag:
+            headers["If-None-Match"] = etag
+
+        response = self._send(method, target, body, headers)
+        if response.status == 304:
+            cached = self.cache.revalidated(target)
+            if cached is not None:
+                return cached
+        response.raise_for_status()
+        if method == "GET":
+            self.cache.record_miss()
+            self.cache.store(target, response)
+        return response
+
+    def _get(self, path: str, **params):
+        return self.request("GET", path, params).json()
+
+    # Read endpoints
+
+    def get_smart_bins(self, offset: Optional[int] = None, limit: Optional[int] = None) -> List[Dict]:
+        return self._get("/api/v2/smart-bins", offset=offset, limit=limit)
+
+    def get_city_zones(self) -> List[Dict]:
+        return self._get("/api/v2/city-zones")
+
+    def get_zone_analytics(self) -> List[Dict]:
+        return self._get("/api/v2/zone-analytics")
+
+    def get_platform_metrics(self) -> Dict:
+        return self._get("/api/v2/platform-metrics")
+
+    def get_operational_kpis(self) -> Dict:
+        return self._get("/api/v2/operational-kpis")
+
+    def get_predictive_alerts(self, offset: Optional[int] = None, limit: Optional[int] = None) -> List[Dict]:
+        return self._get("/api/v2/predictive-alerts", offset=offset, limit=limit)
+
+    def get_scheduler_stats(self) -> Dict:
+        return self._get("/api/v2/scheduler-stats")
+
+    def get_collections(self, bin_id: Optional[str] = None, limit: int = 100) -> List[Dict]:
+        return self._get("/api/v2/collections", bin_id=bin_id, limit=limit)
+
+    # Pagination and delta helpers
+
+    def iter_pages(self, path: str, page_size: int = 500) -> Iterator[List[Dict]]:
+        """Yield pages of an offset/limit endpoint until X-Total-Count is reached"""
+        offset = 0
+        while True:
+            response = self.request("GET", path, {"offset": offset, "limit": page_size})
+            page = response.json()
+            if page:
+                yield page
+            offset += len(page)
+            total = int(response.headers.get("x-total-count", offset))
+            if not page or offset >= total:
+                break
+
+    def iter_smart_bins(self, page_size: int = 500) -> Iterator[Dict]:
+        for page in self.iter_pages("/api/v2/smart-bins", page_size):
+            yield from page
+
+    def collections_since(self, cursor: int = 0, limit: int = 1000) -> Tuple[List[Dict], int]:
+        """Collection events appended since `cursor`, and the cursor for the next call"""
+        response = self.request("GET", "/api/v2/collections", {"cursor": cursor, "limit": limit})
+        return response.json(), int(response.headers.get("x-next-cursor", cursor))
+
+    # Write endpoints
+
+    def record_collection(self, bin_id: str, collected_at=None, weight_kg: Optional[float] = None,
+                          truck_id: Optional[str] = None) -> Dict:
+        payload = {"bin_id": bin_id, "collected_at": collected_at, "weight_kg": weight_kg, "truck_id": truck_id}
+        return self.request("POST", "/api/v2/collections", payload=payload).json()[0]
+
+    def record_collections(self, manifest: List[Dict]) -> List[Dict]:
+        return self.request("POST", "/api/v2/collections", payload=manifest).json()
+
+    def upload_readings(self, readings: List[Dict], batch_size: int = 1000) -> Dict:
+        """Upload readings in batches; returns the summed server results"""
+        result = {"applied": 0, "unknown_bins": []}
+        for batch in chunked(readings, batch_size):
+            reply = self.request("POST", "/api/v2/readings", payload=batch).json()
+            result["applied"] += reply["applied"]
+            result["unknown_bins"].extend(reply["unknown_bins"])
+        return result
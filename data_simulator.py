@@ -1,66 +1,159 @@
+import os
 import random
+import threading
 import time
 from datetime import datetime, timedelta
 import json
 
+DEFAULT_REGIONS = ['Downtown', 'Uptown', 'Industrial', 'Residential', 'Commercial']
+
+# (group, metric, generator, args) - one column of values is generated per metric per tick
+#   int:    random integer in [low, high]
+#   float:  random float in [low, high], rounded to 1 decimal
+#   choice: one of the listed values
+REGION_METRICS = [
+    ('traffic', 'level', 'int', (0, 100)),
+    ('traffic', 'congestion', 'choice', ('Low', 'Medium', 'High', 'Critical')),
+    ('traffic', 'vehicles_per_minute', 'int', (10, 200)),
+    ('traffic', 'avg_speed', 'int', (20, 80)),
+    ('environment', 'air_quality_index', 'float', (0, 300)),
+    ('environment', 'temperature', 'float', (10, 40)),
+    ('environment', 'humidity', 'int', (30, 95)),
+    ('environment', 'noise_level', 'int', (40, 110)),
+    ('energy', 'usage_kwh', 'int', (500, 5000)),
+    ('energy', 'solar_production', 'int', (100, 1000)),
+    ('energy', 'grid_demand', 'int', (400, 4000)),
+    ('energy', 'renewable_percentage', 'float', (20, 80)),
+    ('infrastructure', 'public_transport_usage', 'int', (200, 2000)),
+    ('infrastructure', 'parking_availability', 'int', (0, 100)),
+    ('infrastructure', 'waste_level', 'int', (0, 100)),
+    ('infrastructure', 'water_consumption', 'int', (1000, 10000)),
+]
+
+def load_regions():
+    """Regions from SSACITY_REGIONS (comma-separated names) or SSACITY_REGION_COUNT (generated names)"""
+    names = os.environ.get('SSACITY_REGIONS')
+    if names:
+        return [n.strip() for n in names.split(',') if n.strip()]
+    count = int(os.environ.get('SSACITY_REGION_COUNT', 0))
+    if count > len(DEFAULT_REGIONS):
+        return DEFAULT_REGIONS + [f'Region_{i:04d}' for i in range(len(DEFAULT_REGIONS) + 1, count + 1)]
+    return list(DEFAULT_REGIONS)
+
 class SmartCitySimulator:
-    def __init__(self):
-        self.regions = ['Downtown', 'Uptown', 'Industrial', 'Residential', 'Commercial']
+    def __init__(self, regions=None, tick_seconds=30):
+        self.regions = list(regions or load_regions())
+        # Case-insensitive index so /region/<name> lookups are O(1) and unknown names are rejected
+        self.region_index = {name.lower(): i for i, name in enumerate(self.regions)}
+        self.tick_seconds = tick_seconds
         self.alert_types = {
             'Traffic': ['Accident', 'Congestion', 'Road Closure'],
             'Environment': ['High Pollution', 'Extreme Temperature', 'High Noise'],
             'Energy': ['Grid Overload', 'Power Outage', 'Low Generation'],
             'Security': ['Camera Offline', 'Unusual Activity', 'Emergency Call']
         }
-    
-    def generate_region_data(self, region):
-        """Generate data for a specific region"""
-        base_time = datetime.now()
-        return {
-            'region': region,
-            'timestamp': base_time.isoformat(),
-            'traffic': {
-                'level': random.randint(0, 100),
-                'congestion': random.choice(['Low', 'Medium', 'High', 'Critical']),
-                'vehicles_per_minute': random.randint(10, 200),
-                'avg_speed': random.randint(20, 80)
-            },
-            'environment': {
-                'air_quality_index': round(random.uniform(0, 300), 1),
-                'temperature': round(random.uniform(10, 40), 1),
-                'humidity': random.randint(30, 95),
-                'noise_level': random.randint(40, 110)
-            },
-            'energy': {
-                'usage_kwh': random.randint(500, 5000),
-                'solar_production': random.randint(100, 1000),
-                'grid_demand': random.randint(400, 4000),
-                'renewable_percentage': round(random.uniform(20, 80), 1)
-            },
-            'infrastructure': {
-                'public_transport_usage': random.randint(200, 2000),
-                'parking_availability': random.randint(0, 100),
-                'waste_level': random.randint(0, 100),
-                'water_consumption': random.randint(1000, 10000)
-            }
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._snapshot = None
+
+    def generate_columns(self, n):
+        """Generate every region metric for n regions at once, one column per metric"""
+        rand = random.random
+        columns = {}
+        for group, metric, kind, args in REGION_METRICS:
+            if kind == 'int':
+                low, high = args
+                span = high - low + 1
+                columns[group, metric] = [low + int(rand() * span) for _ in range(n)]
+            elif kind == 'float':
+                low, high = args
+                span = high - low
+                columns[group, metric] = [round(low + rand() * span, 1) for _ in range(n)]
+            else:
+                columns[group, metric] = random.choices(args, k=n)
+        return columns
+
+    def _build_region(self, snapshot, index):
+        columns = snapshot['columns']
+        region = {'region': self.regions[index], 'timestamp': snapshot['timestamp']}
+        for group, metric, _, _ in REGION_METRICS:
+            region.setdefault(group, {})[metric] = columns[group, metric][index]
+        return region
+
+    def _current_snapshot(self):
+        """The snapshot for the current tick; only the very first call builds one on the request path"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self._snapshot = self._generate_snapshot()
+                    self._start_ticker()
+            snapshot = self._snapshot
+        return snapshot
+
+    def _start_ticker(self):
+        """Build each next snapshot on a background thread and swap the reference, so reads never wait"""
+        def loop():
+            next_tick = time.monotonic() + self.tick_seconds
+            while not self._stop.wait(max(0.0, next_tick - time.monotonic())):
+                next_tick += self.tick_seconds
+                try:
+                    self._snapshot = self._generate_snapshot()
+                except Exception as e:
+                    print(f"Snapshot rebuild failed: {e!r}")
+        threading.Thread(target=loop, daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _generate_snapshot(self):
+        n = len(self.regions)
+        snapshot = {
+            'timestamp': datetime.now().isoformat(),
+            'columns': self.generate_columns(n)
         }
-    
-    def generate_dashboard_data(self):
-        """Generate data for all regions"""
+        snapshot['region_list'] = [self._build_region(snapshot, i) for i in range(n)]
+        snapshot['dashboard'] = self._build_dashboard(snapshot)
+        snapshot['dashboard_json'] = json.dumps(snapshot['dashboard'])
+        snapshot['alerts'] = self._build_alerts()
+        snapshot['predictions'] = self._build_predictions()
+        snapshot['historical'] = self._build_historical()
+        return snapshot
+
+    def _build_dashboard(self, snapshot):
+        columns = snapshot['columns']
+        n = max(1, len(self.regions))
+        avg_aqi = sum(columns['environment', 'air_quality_index']) / n
+        critical = columns['traffic', 'congestion'].count('Critical') / n
         return {
-            'timestamp': datetime.now().isoformat(),
-            'overall_status': random.choice(['Normal', 'Attention Needed', 'Critical']),
-            'regions': [self.generate_region_data(region) for region in self.regions],
+            'timestamp': snapshot['timestamp'],
+            'overall_status': 'Critical' if critical > 0.4 else 'Attention Needed' if critical > 0.2 else 'Normal',
+            'regions': snapshot['region_list'],
             'city_summary': {
-                'total_energy_usage': random.randint(10000, 50000),
-                'avg_traffic_congestion': random.randint(20, 80),
-                'air_quality_status': random.choice(['Good', 'Moderate', 'Poor', 'Hazardous']),
-                'public_transport_riders': random.randint(5000, 50000)
+                'total_energy_usage': sum(columns['energy', 'usage_kwh']),
+                'avg_traffic_congestion': round(sum(columns['traffic', 'level']) / n),
+                'air_quality_status': ('Good' if avg_aqi < 50 else 'Moderate' if avg_aqi < 100
+                                       else 'Poor' if avg_aqi < 200 else 'Hazardous'),
+                'public_transport_riders': sum(columns['infrastructure', 'public_transport_usage'])
             }
         }
-    
-    def generate_alerts(self):
-        """Generate alerts for the dashboard"""
+
+    def generate_region_data(self, region):
+        """Data for one region from the current tick, or None for an unknown region"""
+        index = self.region_index.get(region.lower())
+        if index is None:
+            return None
+        return self._current_snapshot()['region_list'][index]
+
+    def generate_dashboard_data(self):
+        """Data for all regions"""
+        return self._current_snapshot()['dashboard']
+
+    def generate_dashboard_json(self):
+        """Serialized dashboard data, encoded once per tick"""
+        return self._current_snapshot()['dashboard_json']
+
+    def _build_alerts(self):
         alerts = []
         for i in range(random.randint(0, 5)):
             alert_type = random.choice(list(self.alert_types.keys()))
@@ -77,13 +170,16 @@ class SmartCitySimulator:
                 'priority': random.randint(1, 5)
             })
         return sorted(alerts, key=lambda x: x['priority'], reverse=True)
-    
-    def generate_predictions(self):
-        """Generate predictive analytics"""
+
+    def generate_alerts(self):
+        """Alerts for the dashboard"""
+        return self._current_snapshot()['alerts']
+
+    def _build_predictions(self):
         base_time = datetime.now()
         hours = 24
         predictions = []
-        
+
         for hour in range(hours):
             time_point = base_time + timedelta(hours=hour)
             predictions.append({
@@ -93,14 +189,17 @@ class SmartCitySimulator:
                 'air_quality_prediction': round(random.uniform(0, 300), 1),
                 'probability_incident': round(random.uniform(0, 0.3), 2)
             })
-        
+
         return predictions
-    
-    def generate_historical_data(self, hours=72):
-        """Generate historical data for charts"""
+
+    def generate_predictions(self):
+        """Predictive analytics"""
+        return self._current_snapshot()['predictions']
+
+    def _build_historical(self, hours=72):
         historical = []
         base_time = datetime.now() - timedelta(hours=hours)
-        
+
         for i in range(hours):
             timestamp = base_time + timedelta(hours=i)
             historical.append({
@@ -111,9 +210,15 @@ class SmartCitySimulator:
                 'public_transport': random.randint(1000, 10000),
                 'incidents': random.randint(0, 10)
             })
-        
+
         return historical
 
+    def generate_historical_data(self, hours=72):
+        """Historical data for charts"""
+        if hours == 72:
+            return self._current_snapshot()['historical']
+        return self._build_historical(hours)
+
 # Create singleton instance
 simulator = SmartCitySimulator()
 
@@ -121,6 +226,9 @@ simulator = SmartCitySimulator()
 def get_dashboard_data():
     return simulator.generate_dashboard_data()
 
+def get_dashboard_json():
+    return simulator.generate_dashboard_json()
+
 def get_alerts():
     return simulator.generate_alerts()
 